@@ -1,74 +1,114 @@
 import board
 import displayio
-from adafruit_display_shapes.line import Line
-import math
-import time
+import fast_math
+from fast_math import ANGLE_STEPS, FRACTION_BITS, mul, to_fixed
+from frame_scheduler import FrameScheduler
+from mesh_engine import MeshView, load_mesh
+
+# bitmaptools draws lines natively where the firmware has it
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
 
 # Initialize the display
 display = board.DISPLAY
 root_group = displayio.Group()
 display.show(root_group)
+display.auto_refresh = False
+
+# One persistent 2-colour framebuffer that the edges are drawn into
+framebuffer = displayio.Bitmap(display.width, display.height, 2)
+palette = displayio.Palette(2)
+palette[0] = 0x000000
+palette[1] = 0xFFFFFF
+root_group.append(displayio.TileGrid(framebuffer, pixel_shader=palette))
 
-# Parameters for the cube
-cube_size = 50
-cube_center = (160, 120)  # Center of the display for PyPortal
+# Animation settings
+SPIN_Y = 50  # Rotation speed around the Y axis, degrees per second
+SPIN_Z = 30  # Rotation speed around the Z axis, degrees per second
+PHYSICS_HZ = 30
+RENDER_FPS = 30
+FRAME_REPORT_INTERVAL = 5  # Seconds between frame statistics on serial, 0 to disable
 
-# Generate initial vertices of the cube (at origin, will translate to cube_center)
-half_size = cube_size // 2
-vertices = [
-    [-half_size, -half_size, -half_size],
-    [half_size, -half_size, -half_size],
-    [half_size, half_size, -half_size],
-    [-half_size, half_size, -half_size],
-    [-half_size, -half_size, half_size],
-    [half_size, -half_size, half_size],
-    [half_size, half_size, half_size],
-    [-half_size, half_size, half_size],
-]
+# Parameters for the mesh; any .obj file with "v" and "f" lines can be shown
+MESH_FILE = "meshes/cube.obj"
+MESH_SCALE = 25  # Model units are scaled by this; the cube spans -1 to 1, so 50px across
+VIEW_DISTANCE = 200  # Distance from the viewer to the mesh centre, in pixels
+FOCAL_LENGTH = 200  # Perspective strength; equal to VIEW_DISTANCE keeps the centre at scale 1
+mesh_center = (160, 120)  # Center of the display for PyPortal
 
-# Edges defined by vertex indices
-edges = [
-    (0, 1), (1, 2), (2, 3), (3, 0),
-    (4, 5), (5, 6), (6, 7), (7, 4),
-    (0, 4), (1, 5), (2, 6), (3, 7)
-]
+mesh = load_mesh(MESH_FILE, MESH_SCALE)
+view = MeshView(mesh, mesh_center[0], mesh_center[1], VIEW_DISTANCE, FOCAL_LENGTH)
 
-def rotate_vertex(vertex, angle_y, angle_z):
-    # Rotate around Y axis
-    x, y, z = vertex
-    temp_x = x * math.cos(angle_y) - z * math.sin(angle_y)
-    temp_z = x * math.sin(angle_y) + z * math.cos(angle_y)
-    # Rotate around Z axis
-    z = temp_z
-    x = temp_x * math.cos(angle_z) - y * math.sin(angle_z)
-    y = temp_x * math.sin(angle_z) + y * math.cos(angle_z)
-    return [x, y, z]
+# Rotation matrix (row-major 3x3, Q16 fixed point), rebuilt once per frame
+matrix = [0] * 9
 
-def project_vertex(vertex):
-    # Project the 3D vertex onto the 2D plane
-    x, y, _ = vertex
-    return int(x + cube_center[0]), int(y + cube_center[1])
+def rotation_matrix(angle_y, angle_z):
+    # Rotation around the Y axis followed by rotation around the Z axis, as one matrix
+    # Angles are in sine table steps
+    cos_y = fast_math.cos(angle_y)
+    sin_y = fast_math.sin(angle_y)
+    cos_z = fast_math.cos(angle_z)
+    sin_z = fast_math.sin(angle_z)
+    matrix[0] = mul(cos_y, cos_z)
+    matrix[1] = -sin_z
+    matrix[2] = -mul(sin_y, cos_z)
+    matrix[3] = mul(cos_y, sin_z)
+    matrix[4] = cos_z
+    matrix[5] = -mul(sin_y, sin_z)
+    matrix[6] = sin_y
+    matrix[7] = 0
+    matrix[8] = cos_y
 
-def draw_cube(angle_y, angle_z):
-    # Clear previous frame
-    while len(root_group) > 0:
-        root_group.pop()
+def draw_line(x0, y0, x1, y1, color):
+    # Bresenham's line from (x0, y0) to (x1, y1), skipping pixels off the framebuffer
+    if bitmaptools is not None:
+        bitmaptools.draw_line(framebuffer, x0, y0, x1, y1, color)
+        return
+    width = framebuffer.width
+    height = framebuffer.height
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    error = dx + dy
+    while True:
+        if 0 <= x0 < width and 0 <= y0 < height:
+            # A linear index avoids building an (x, y) tuple for every pixel
+            framebuffer[y0 * width + x0] = color
+        if x0 == x1 and y0 == y1:
+            return
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x0 += step_x
+        if doubled <= dx:
+            error += dx
+            y0 += step_y
 
-    # Rotate, project, and draw edges
-    for edge in edges:
-        start = vertices[edge[0]]
-        end = vertices[edge[1]]
-        rotated_start = rotate_vertex(start, angle_y, angle_z)
-        rotated_end = rotate_vertex(end, angle_y, angle_z)
-        projected_start = project_vertex(rotated_start)
-        projected_end = project_vertex(rotated_end)
-        line = Line(projected_start[0], projected_start[1], projected_end[0], projected_end[1], color=0xFFFFFF)
-        root_group.append(line)
+def draw_mesh(angle_y, angle_z):
+    # Rotate, project and cull the mesh, erase last frame's edges and draw the visible ones
+    rotation_matrix(angle_y, angle_z)
+    view.update(matrix)
+    view.erase(draw_line)
+    view.draw(draw_line)
+    display.refresh(target_frames_per_second=None)
 
+scheduler = FrameScheduler(PHYSICS_HZ, RENDER_FPS, report_interval=FRAME_REPORT_INTERVAL)
+# Angles are Q16 sine table steps, wrapped every turn so they never lose precision
+ANGLE_WRAP = (ANGLE_STEPS << FRACTION_BITS) - 1
+spin_y = to_fixed(SPIN_Y * ANGLE_STEPS / 360 / PHYSICS_HZ)
+spin_z = to_fixed(SPIN_Z * ANGLE_STEPS / 360 / PHYSICS_HZ)
 angle_y = 0
 angle_z = 0
-while True:
-    draw_cube(angle_y, angle_z)
-    angle_y += math.radians(5)
-    angle_z += math.radians(3)
-    time.sleep(0.1)
+
+def step():
+    global angle_y, angle_z
+    angle_y = (angle_y + spin_y) & ANGLE_WRAP
+    angle_z = (angle_z + spin_z) & ANGLE_WRAP
+
+def render():
+    draw_mesh(angle_y >> FRACTION_BITS, angle_z >> FRACTION_BITS)
+
+scheduler.run(step, render)
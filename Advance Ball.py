@@ -1,9 +1,10 @@
-import time
 import board
 import random
 import displayio
 from adafruit_display_shapes.circle import Circle
-import math
+from ball_engine import Ball, BallWorld, SpatialHash
+from dirty_regions import DirtyRegions
+from frame_scheduler import FrameScheduler
 
 # ---------------------------------
 # Program Description and Parameters
@@ -20,6 +21,12 @@ NUM_BALLS = 5 # Total number of balls in the simulation
 BALL_SPEED = 5  # Speed of the balls
 BALL_SIZE = 20 # Diameter of the balls
 
+# Frame Settings
+PHYSICS_HZ = 30  # Physics steps per second; BALL_SPEED is in pixels per step
+RENDER_FPS = 30  # Target display refresh rate
+FRAME_REPORT_INTERVAL = 10  # Seconds between frame statistics on serial, 0 to disable
+FULL_REFRESH_FRACTION = 0.5  # Push the whole panel once this much of it has changed
+
 # Neon Colors
 # A list of 25 distinct neon color hex codes.
 NEON_COLORS = [
@@ -30,63 +37,6 @@ NEON_COLORS = [
     0x7F7F00, 0x007FFF, 0xFF7FFF, 0x7FFF7F, 0xFFFF7F
 ]
 
-# -------------------
-# Ball Class Definition
-# -------------------
-class Ball:
-    # Initializer for the Ball class
-    def __init__(self, group, color, pos, velocity, size):
-        self.size = size
-        self.group = group
-        self.color = color
-        self.position = pos
-        self.velocity = velocity
-        self.circle = Circle(pos[0], pos[1], size // 2, fill=color)
-        self.group.append(self.circle)
-
-    # Update the position of the ball and handle wall collisions
-    def update(self):
-        x, y = self.position
-        vx, vy = self.velocity
-
-        # Update position
-        x += vx
-        y += vy
-
-        # Bounce off the edges and adjust position to be within bounds
-        if x < 0 or x > DISPLAY_WIDTH - self.size:
-            vx = -vx
-            x = max(0, min(x, DISPLAY_WIDTH - self.size))
-        if y < 0 or y > DISPLAY_HEIGHT - self.size:
-            vy = -vy
-            y = max(0, min(y, DISPLAY_HEIGHT - self.size))
-
-        self.position = (x, y)
-        self.velocity = (vx, vy)
-        self.circle.x = int(x)
-        self.circle.y = int(y)
-
-    # Adjust position to prevent balls from sticking after a collision
-    def adjust_for_collision(self, other):
-        dx = other.position[0] - self.position[0]
-        dy = other.position[1] - self.position[1]
-        distance = math.sqrt(dx**2 + dy**2)
-        overlap = self.size / 2 + other.size / 2 - distance
-        if distance != 0:
-            self.position = (self.position[0] - overlap * dx / distance, self.position[1] - overlap * dy / distance)
-
-# ------------------------
-# Collision Check Function
-# ------------------------
-# Checks if two balls have collided
-def check_collision(ball1, ball2):
-    dx = ball1.position[0] - ball2.position[0]
-    dy = ball1.position[1] - ball2.position[1]
-    distance = math.sqrt(dx**2 + dy**2)
-    if distance < ball1.size / 2 + ball2.size / 2:
-        return True
-    return False
-
 # ----------------
 # Main Program Loop
 # ----------------
@@ -95,31 +45,54 @@ def main():
     display = board.DISPLAY
     display_group = displayio.Group()
     display.show(display_group)
+    # Manual refresh of only the areas the balls moved through
+    regions = DirtyRegions(display, display_group, NUM_BALLS, FULL_REFRESH_FRACTION)
 
     # Create balls
+    world = BallWorld(NUM_BALLS, DISPLAY_WIDTH, DISPLAY_HEIGHT)
     balls = []
     for _ in range(NUM_BALLS):
         color_index = random.randrange(len(NEON_COLORS))
         color = NEON_COLORS.pop(color_index)  # Randomly select and remove a color
         pos = (random.randint(0, DISPLAY_WIDTH - BALL_SIZE), random.randint(0, DISPLAY_HEIGHT - BALL_SIZE))
         velocity = (random.uniform(-BALL_SPEED, BALL_SPEED), random.uniform(-BALL_SPEED, BALL_SPEED))
-        ball = Ball(display_group, color, pos, velocity, BALL_SIZE)
+        circle = Circle(pos[0], pos[1], BALL_SIZE // 2, fill=color)
+        display_group.append(circle)
+        ball = Ball(world, circle, pos, velocity, BALL_SIZE, color)
         balls.append(ball)
 
-    # Main loop
-    while True:
+    # Broadphase grid. Two balls closing at full speed on both axes can end a step up to
+    # 2 * sqrt(2) * BALL_SPEED apart after passing through each other, so cells are sized
+    # to keep such pairs in neighbouring cells for the swept test
+    grid = SpatialHash(DISPLAY_WIDTH, DISPLAY_HEIGHT, BALL_SIZE + 3 * BALL_SPEED)
+    for i in range(world.count):
+        grid.insert(i, world.x[i], world.y[i])
+
+    # Physics runs at a fixed rate; drawing is skipped rather than slowing it down
+    scheduler = FrameScheduler(PHYSICS_HZ, RENDER_FPS, report_interval=FRAME_REPORT_INTERVAL)
+
+    def step():
+        # Move every ball and bounce it off the edges in one batched pass
+        world.step()
+        for i in range(world.count):
+            grid.move(i, world.x[i], world.y[i])
+
+        # Each candidate pair is reported once, so the response (swap velocities and adjust
+        # positions) is applied once per contact; fast pairs get a swept test
+        count = grid.pairs()
+        found = grid.found
+        for k in range(0, 2 * count, 2):
+            world.collide(found[k], found[k + 1])
+
+    def render():
         for ball in balls:
-            ball.update()
-            for other in balls:
-                if ball != other and check_collision(ball, other):
-                    # Swap velocities and adjust positions
-                    ball.velocity, other.velocity = other.velocity, ball.velocity
-                    ball.adjust_for_collision(other)
-                    other.adjust_for_collision(ball)
+            ball.draw(regions)
 
-        # Refresh the display
-        display.refresh()
-        time.sleep(0.01)
+        # Refresh the changed parts of the display
+        regions.flush()
+
+    # Main loop
+    scheduler.run(step, render)
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,11 @@
-import time
 import board
 import random
 import displayio
-from adafruit_display_shapes.circle import Circle
-import math
+from ball_engine import Ball, BallWorld, Growth, SpatialHash
+from ball_sprites import BallSprites
+from dirty_regions import DirtyRegions
+from frame_scheduler import FrameScheduler
+from touch_input import PRESS, TouchSampler
 import adafruit_touchscreen
 
 """
@@ -31,6 +33,13 @@ MIN_BALL_SIZE = 1
 MAX_SIZE_DURATION = 7  # Time in seconds to stay at max size
 MIN_SIZE_DURATION = 7  # Time in seconds to stay at min size
 
+# Frame Settings
+PHYSICS_HZ = 30  # Physics steps per second; BALL_SPEED is in pixels per step
+RENDER_FPS = 30  # Target display refresh rate
+FRAME_REPORT_INTERVAL = 10  # Seconds between frame statistics on serial, 0 to disable
+FULL_REFRESH_FRACTION = 0.5  # Push the whole panel once this much of it has changed
+TOUCH_SAMPLE_HZ = 20  # Touchscreen reads per second
+
 # Expanded Neon Colors with a total of 125 bright neon shades
 NEON_COLORS = [
     0xD500FF, 0x00FFEA, 0x00FF00, 0xFFFF00, 0xFF0000,
@@ -67,145 +76,75 @@ ts = adafruit_touchscreen.Touchscreen(
     size=(DISPLAY_WIDTH, DISPLAY_HEIGHT)
 )
 
-# Ball Class
-class Ball:
-    def __init__(self, group, color, pos, velocity, size):
-        self.size = size
-        self.group = group
-        self.color = color
-        self.position = pos
-        self.velocity = velocity
-        self.circle = Circle(pos[0], pos[1], size // 2, fill=color)
-        self.group.append(self.circle)
-        self.hit_count = 0
-        self.state = "growing"
-        self.state_change_time = time.monotonic()
-
-    def update(self):
-        x, y = self.position
-        vx, vy = self.velocity
-
-        # Update position and check for wall collisions
-        x += vx
-        y += vy
-        collision_occurred = False
-
-        if x < 0 or x > DISPLAY_WIDTH - self.size:
-            vx = -vx
-            x = max(0, min(x, DISPLAY_WIDTH - self.size))
-            collision_occurred = True
-        if y < 0 or y > DISPLAY_HEIGHT - self.size:
-            vy = -vy
-            y = max(0, min(y, DISPLAY_HEIGHT - self.size))
-            collision_occurred = True
-
-        if collision_occurred:
-            self.hit_count += 1
-            if self.hit_count >= 5:
-                self.change_color()
-            self.grow()
-
-        self.position = (x, y)
-        self.velocity = (vx, vy)
-        self.circle.x = int(x)
-        self.circle.y = int(y)
-
-        # State change logic
-        current_time = time.monotonic()
-        if self.state == "at_max_size" and current_time - self.state_change_time > MAX_SIZE_DURATION:
-            self.state = "shrinking"
-            self.state_change_time = current_time
-        elif self.state == "at_min_size" and current_time - self.state_change_time > MIN_SIZE_DURATION:
-            self.state = "growing"
-            self.state_change_time = current_time
-
-    def grow(self):
-        if self.state == "growing":
-            if self.size < MAX_BALL_SIZE:
-                self.size += BALL_GROWTH
-                self.update_circle()
-            else:
-                self.state = "at_max_size"
-                self.state_change_time = time.monotonic()
-        elif self.state == "shrinking":
-            if self.size > MIN_BALL_SIZE:
-                self.size -= BALL_GROWTH
-                self.update_circle()
-            else:
-                self.state = "at_min_size"
-                self.state_change_time = time.monotonic()
-
-    def update_circle(self):
-        self.group.remove(self.circle)
-        self.circle = Circle(int(self.position[0]), int(self.position[1]), self.size // 2, fill=self.color)
-        self.group.append(self.circle)
-
-    def change_color(self):
-        new_color_index = random.randrange(len(NEON_COLORS))
-        new_color = NEON_COLORS[new_color_index]
-        self.color = new_color
-        self.circle.fill = new_color
-        self.hit_count = 0
-
-    def redirect(self, new_velocity):
-        self.velocity = new_velocity
-
-    def adjust_for_collision(self, other):
-        dx = other.position[0] - self.position[0]
-        dy = other.position[1] - self.position[1]
-        distance = math.sqrt(dx**2 + dy**2)
-        min_distance = self.size / 2 + other.size / 2
-        if distance < min_distance:
-            overlap = min_distance - distance
-            if distance != 0:
-                adjust_x = overlap * dx / distance
-                adjust_y = overlap * dy / distance
-                self.position = (self.position[0] - adjust_x / 2, self.position[1] - adjust_y / 2)
-                other.position = (other.position[0] + adjust_x / 2, other.position[1] + adjust_y / 2)
-
-def check_collision(ball1, ball2):
-    dx = ball1.position[0] - ball2.position[0]
-    dy = ball1.position[1] - ball2.position[1]
-    distance = math.sqrt(dx**2 + dy**2)
-    return distance < ball1.size / 2 + ball2.size / 2
-
-def check_for_touch(balls):
-    point = ts.touch_point
-    if point:
-        x, y, _ = point  # The z value is the pressure, which we don't need here
-        for ball in balls:
-            if math.sqrt((ball.position[0] - x)**2 + (ball.position[1] - y)**2) <= ball.size / 2:
-                ball.redirect((-ball.velocity[0], -ball.velocity[1]))
-                break
+def check_for_touch(world, grid, touch, now):
+    # Reverse the ball under a new touch; holding a finger down only counts once
+    if touch.poll(now) == PRESS:
+        i = world.find(touch.x, touch.y, grid.near(touch.x, touch.y))
+        if i >= 0:
+            world.reverse(i)
 
 def main():
     display = board.DISPLAY
     display_group = displayio.Group()
     display.show(display_group)
+    # Manual refresh of only the areas the balls moved through
+    regions = DirtyRegions(display, display_group, NUM_BALLS, FULL_REFRESH_FRACTION)
 
+    world = BallWorld(NUM_BALLS, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+    # Every ball size is drawn once up front and shared by all balls
+    sprites = BallSprites(MIN_BALL_SIZE, MAX_BALL_SIZE)
+    growth = Growth(BALL_GROWTH, MIN_BALL_SIZE, MAX_BALL_SIZE, MAX_SIZE_DURATION, MIN_SIZE_DURATION)
     balls = []
     for _ in range(NUM_BALLS):
         color_index = random.randrange(len(NEON_COLORS))
         color = NEON_COLORS[color_index]
         pos = (random.randint(0, DISPLAY_WIDTH - BALL_SIZE), random.randint(0, DISPLAY_HEIGHT - BALL_SIZE))
         velocity = (random.uniform(-BALL_SPEED, BALL_SPEED), random.uniform(-BALL_SPEED, BALL_SPEED))
-        ball = Ball(display_group, color, pos, velocity, BALL_SIZE)
+        sprite = sprites.create(BALL_SIZE, color, pos[0], pos[1])
+        display_group.append(sprite)
+        # Balls grow and shrink on wall hits and change colour every fifth hit
+        ball = Ball(world, sprite, pos, velocity, BALL_SIZE, color,
+                    sprites=sprites, growth=growth, colors=NEON_COLORS)
         balls.append(ball)
 
-    while True:
-        #check_for_touch(balls)
+    # Broadphase grid. Two balls closing at full speed on both axes can end a step up to
+    # 2 * sqrt(2) * BALL_SPEED apart after passing through each other, so cells are sized
+    # to keep such pairs in neighbouring cells for the swept test
+    grid = SpatialHash(DISPLAY_WIDTH, DISPLAY_HEIGHT, MAX_BALL_SIZE + 3 * BALL_SPEED)
+    for i in range(world.count):
+        grid.insert(i, world.x[i], world.y[i])
+
+    # Size timers and touch sampling run on the scheduler's simulation clock
+    scheduler = FrameScheduler(PHYSICS_HZ, RENDER_FPS, report_interval=FRAME_REPORT_INTERVAL)
+    touch = TouchSampler(ts, TOUCH_SAMPLE_HZ)
+
+    def step():
+        check_for_touch(world, grid, touch, scheduler.time)
+
+        # One batched move and wall bounce for every ball
+        world.step()
+        for i in range(world.count):
+            grid.move(i, world.x[i], world.y[i])
+
+        # Each candidate pair is reported once, so the response (a velocity swap) is applied
+        # once per contact; fast pairs get a swept test so small balls can't pass through
+        count = grid.pairs()
+        found = grid.found
+        for k in range(0, 2 * count, 2):
+            world.collide(found[k], found[k + 1])
+
+        # Wall hits grow, shrink and recolour balls; timed size states fire from one wheel
+        now = scheduler.time
+        for ball in balls:
+            ball.update(now)
+        growth.poll(world, now)
 
+    def render():
         for ball in balls:
-            ball.update()
-            for other in balls:
-                if ball != other and check_collision(ball, other):
-                    ball.adjust_for_collision(other)
-                    other.adjust_for_collision(ball)
-                    # Swap velocities for a simple collision response
-                    ball.velocity, other.velocity = other.velocity, ball.velocity
-
-        display.refresh()
-        time.sleep(0.01)
+            ball.draw(regions)
+        regions.flush()
+
+    scheduler.run(step, render)
 
 if __name__ == "__main__":
     main()
@@ -1,50 +1,43 @@
 import time
 import board
 import displayio
-import random
-from adafruit_display_shapes.rect import Rect
+from life_engine import CycleDetector, LifeBoard
 
 # Game parameters
-CELL_SIZE = 20  # Adjusted for optimal display on PyPortal 20
-GRID_WIDTH = 16  # Optimized grid width 16
-GRID_HEIGHT = 12  # Optimized grid height 12
+CELL_SIZE = 4  # Screen pixels per cell (display scale factor); 1 gives a 320x240 board
+GRID_WIDTH = 320 // CELL_SIZE  # Cells across the screen
+GRID_HEIGHT = 240 // CELL_SIZE  # Cells down the screen
 MAX_ITERATIONS = 50 # 300
+MAX_PERIOD = 6  # Reseed early once the board repeats with a period up to this, or dies out
 UPDATE_INTERVAL = 0.1  # Reduced update interval for smoother animations 0.1
 
 def create_grid():
     """Create a new grid with random initial states."""
-    return [[random.choice([0, 1]) for _ in range(GRID_HEIGHT)] for _ in range(GRID_WIDTH)]
+    grid = LifeBoard(GRID_WIDTH, GRID_HEIGHT)
+    grid.randomize()
+    return grid
 
 def create_grid_display(group):
-    """Create and return a list of rectangle objects for display."""
-    rects = []
-    for x in range(GRID_WIDTH):
-        row = []
-        for y in range(GRID_HEIGHT):
-            rect = Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE, fill=0x000000)
-            group.append(rect)
-            row.append(rect)
-        rects.append(row)
-    return rects
+    """Create and return a bitmap with one pixel per cell, scaled up to CELL_SIZE on screen."""
+    bitmap = displayio.Bitmap(GRID_WIDTH, GRID_HEIGHT, 2)
+    palette = displayio.Palette(2)
+    palette[0] = 0x000000
+    palette[1] = 0x00FF00
+    layer = displayio.Group(scale=CELL_SIZE)
+    layer.append(displayio.TileGrid(bitmap, pixel_shader=palette))
+    group.append(layer)
+    return bitmap
 
-def update_grid_display(grid, rects):
-    """Update the display based on the current grid state."""
-    for x in range(GRID_WIDTH):
-        for y in range(GRID_HEIGHT):
-            rects[x][y].fill = 0x00FF00 if grid[x][y] else 0x000000
-
-def count_neighbors(grid, x, y):
-    """Count alive neighbors around a given cell."""
-    return sum(grid[(x + dx) % GRID_WIDTH][(y + dy) % GRID_HEIGHT] for dx in [-1, 0, 1] for dy in [-1, 0, 1] if (dx, dy) != (0, 0))
-
-def update_grid(grid):
-    """Update the grid for the next generation."""
-    new_grid = [[grid[x][y] for y in range(GRID_HEIGHT)] for x in range(GRID_WIDTH)]
-    for x in range(GRID_WIDTH):
-        for y in range(GRID_HEIGHT):
-            neighbors = count_neighbors(grid, x, y)
-            new_grid[x][y] = 1 if (grid[x][y] and neighbors in [2, 3]) or (not grid[x][y] and neighbors == 3) else 0
-    return new_grid
+def update_grid_display(grid, bitmap):
+    """Update the display for the cells that changed since it was last drawn."""
+    for y, flipped in grid.changed:
+        row = grid.rows[y]
+        x = 0
+        while flipped:
+            if flipped & 1:
+                bitmap[x, y] = (row >> x) & 1
+            flipped >>= 1
+            x += 1
 
 def main():
     display = board.DISPLAY
@@ -52,16 +45,20 @@ def main():
     display.show(group)
 
     grid = create_grid()
-    rects = create_grid_display(group)
+    bitmap = create_grid_display(group)
+    update_grid_display(grid, bitmap)
+    cycles = CycleDetector(MAX_PERIOD)
 
     iterations = 0
     while True:
         time.sleep(UPDATE_INTERVAL)
-        grid = update_grid(grid)
-        update_grid_display(grid, rects)
+        grid.step()
+        update_grid_display(grid, bitmap)
         iterations += 1
-        if iterations >= MAX_ITERATIONS:
-            grid = create_grid()
+        if iterations >= MAX_ITERATIONS or cycles.settled(grid):
+            grid.randomize()
+            update_grid_display(grid, bitmap)
+            cycles.reset()
             iterations = 0
 
 if __name__ == "__main__":
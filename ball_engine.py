@@ -0,0 +1,565 @@
+"""
+Title: Ball Engine
+
+About: Shared ball engine for the PyPortal bouncing-ball programs: array-backed physics,
+collision broadphase and the Ball class, with growth and colour cycling switched on per
+program.
+"""
+from array import array
+import random
+
+# Use ulab (CircuitPython) or NumPy (desktop) for the batched update when either is present
+try:
+    from ulab import numpy as np
+except ImportError:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+# Fewest balls for which step() uses ulab/NumPy. The batched update builds a dozen or so
+# temporary ndarrays per step, which only pays off in many balls; below this the plain loop,
+# which allocates nothing, is used
+VECTORISE_MIN_BALLS = 64
+
+# Ball size states, stored in BallWorld.state
+GROWING = 0
+AT_MAX_SIZE = 1
+SHRINKING = 2
+AT_MIN_SIZE = 3
+
+# Transition table, indexed by state: size change per wall hit (in Growth.step units), state
+# entered when that change would pass a size limit, and state entered when the state's timer
+# fires (-1 for states without a timer)
+GROW_DIRECTION = (1, 0, -1, 0)
+LIMIT_STATE = (AT_MAX_SIZE, AT_MAX_SIZE, AT_MIN_SIZE, AT_MIN_SIZE)
+TIMER_STATE = (-1, SHRINKING, -1, GROWING)
+
+
+class SpatialHash:
+    """
+    Uniform-grid broadphase for ball-to-ball collisions.
+    - width, height: size of the area the balls move in
+    - cell_size: edge length of a grid cell, at least the largest ball diameter
+
+    - pair_capacity: number of pairs the pair buffer starts with room for
+
+    Items are small non-negative integers (ball indices), bucketed by the cell their
+    position falls in and moved between buckets only when they cross a cell boundary. Because
+    a cell is as wide as the largest ball, two balls can only touch if they sit in the same or
+    adjacent cells, so pairs() only has to look at each cell and four of its neighbours and
+    reports every candidate pair exactly once.
+
+    Buckets are kept when they empty and pairs go into one reused array, so once every cell a
+    ball visits has a bucket and the pair buffer has grown to the busiest step, moving and
+    pairing allocate nothing.
+    """
+
+    __slots__ = ("cell_size", "cols", "rows", "cells", "cell_of", "found")
+
+    # Half of the 8-neighbourhood; the other half is covered when the neighbour is the origin
+    NEIGHBOURS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+    def __init__(self, width, height, cell_size, pair_capacity=64):
+        self.cell_size = max(1, int(cell_size))
+        self.cols = int(width) // self.cell_size + 1
+        self.rows = int(height) // self.cell_size + 1
+        self.cells = {}
+        self.cell_of = {}
+        # Pair k found by the last pairs() call is (found[2 * k], found[2 * k + 1])
+        self.found = array("H", bytes(4 * pair_capacity))
+
+    def cell_for(self, x, y):
+        """Return the (clamped) cell index for a position."""
+        cx = min(max(int(x) // self.cell_size, 0), self.cols - 1)
+        cy = min(max(int(y) // self.cell_size, 0), self.rows - 1)
+        return cy * self.cols + cx
+
+    def insert(self, item, x, y):
+        """Add an item at the given position."""
+        cell = self.cell_for(x, y)
+        self.cell_of[item] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = [item]
+        else:
+            bucket.append(item)
+
+    def remove(self, item):
+        """Remove an item from the grid."""
+        cell = self.cell_of.pop(item)
+        self.cells[cell].remove(item)
+
+    def move(self, item, x, y):
+        """Update an item's position, touching the buckets only when it changes cell."""
+        cell = self.cell_for(x, y)
+        old_cell = self.cell_of[item]
+        if cell == old_cell:
+            return
+        self.cells[old_cell].remove(item)
+        self.cell_of[item] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = [item]
+        else:
+            bucket.append(item)
+
+    def near(self, x, y):
+        """Return a list of the items in the cell containing (x, y) and its neighbours."""
+        result = []
+        cx = min(max(int(x) // self.cell_size, 0), self.cols - 1)
+        cy = min(max(int(y) // self.cell_size, 0), self.rows - 1)
+        for ny in range(max(cy - 1, 0), min(cy + 2, self.rows)):
+            for nx in range(max(cx - 1, 0), min(cx + 2, self.cols)):
+                bucket = self.cells.get(ny * self.cols + nx)
+                if bucket is not None:
+                    result.extend(bucket)
+        return result
+
+    def _grow_found(self):
+        """Double the pair buffer, keeping its contents, and return it."""
+        self.found.extend(array("H", bytes(2 * len(self.found))))
+        return self.found
+
+    def pairs(self):
+        """
+        Store every candidate pair in found, each unordered pair once, and return how many
+        there are. Pair k is (found[2 * k], found[2 * k + 1]).
+        """
+        found = self.found
+        limit = len(found)
+        n = 0
+        cells = self.cells
+        cols = self.cols
+        rows = self.rows
+        # Indexing rather than items() or divmod(), which would build a tuple per cell
+        for cell in cells:
+            bucket = cells[cell]
+            count = len(bucket)
+            if not count:
+                continue
+            for i in range(count):
+                a = bucket[i]
+                for j in range(i + 1, count):
+                    if n == limit:
+                        found = self._grow_found()
+                        limit = len(found)
+                    found[n] = a
+                    found[n + 1] = bucket[j]
+                    n += 2
+            cy = cell // cols
+            cx = cell - cy * cols
+            for dx, dy in self.NEIGHBOURS:
+                nx = cx + dx
+                ny = cy + dy
+                if nx < 0 or nx >= cols or ny >= rows:
+                    continue
+                other = cells.get(ny * cols + nx)
+                if not other:
+                    continue
+                for a in bucket:
+                    for b in other:
+                        if n == limit:
+                            found = self._grow_found()
+                            limit = len(found)
+                        found[n] = a
+                        found[n + 1] = b
+                        n += 2
+        return n // 2
+
+
+class BallWorld:
+    """
+    Struct-of-arrays store for ball physics.
+    - capacity: maximum number of balls
+    - width, height: size of the area the balls bounce around in
+    - clamp: reflect balls that cross a wall back inside it (otherwise only the velocity flips)
+
+    Positions, velocities, sizes and states live in parallel preallocated arrays indexed by
+    ball number, so stepping the world does not build any tuples. After step(), hit[i] is 1
+    for every ball that bounced off a wall during that step.
+
+    Wall bounces reflect the part of the move that went past the wall, which is where the
+    ball would be had it bounced at the moment of impact, so fast balls neither stick to nor
+    lose distance at the walls. collide() does the same for pairs of balls.
+    """
+
+    __slots__ = ("capacity", "count", "width", "height", "clamp", "x", "y", "vx", "vy", "size",
+                 "state", "hit", "_np_x", "_np_y", "_np_vx", "_np_vy", "_np_size", "_np_hit")
+
+    def __init__(self, capacity, width, height, clamp=True):
+        self.capacity = capacity
+        self.count = 0
+        self.width = width
+        self.height = height
+        self.clamp = clamp
+        self.x = array("f", [0.0] * capacity)
+        self.y = array("f", [0.0] * capacity)
+        self.vx = array("f", [0.0] * capacity)
+        self.vy = array("f", [0.0] * capacity)
+        self.size = array("f", [0.0] * capacity)
+        self.state = array("b", [GROWING] * capacity)
+        self.hit = array("b", [0] * capacity)
+        if np is not None:
+            # ndarray views sharing memory with the arrays above
+            float_type = np.float32 if hasattr(np, "float32") else np.float
+            self._np_x = np.frombuffer(self.x, dtype=float_type)
+            self._np_y = np.frombuffer(self.y, dtype=float_type)
+            self._np_vx = np.frombuffer(self.vx, dtype=float_type)
+            self._np_vy = np.frombuffer(self.vy, dtype=float_type)
+            self._np_size = np.frombuffer(self.size, dtype=float_type)
+            self._np_hit = np.frombuffer(self.hit, dtype=np.int8)
+
+    def add(self, x, y, vx, vy, size, state=GROWING):
+        """Add a ball and return its index."""
+        if self.count >= self.capacity:
+            raise ValueError("BallWorld is full")
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.size[i] = size
+        self.state[i] = state
+        self.hit[i] = 0
+        self.count += 1
+        return i
+
+    def step(self):
+        """Move every ball by its velocity and bounce it off the walls."""
+        if np is not None and self.count >= VECTORISE_MIN_BALLS:
+            self._step_vectorised()
+        else:
+            self._step_loop()
+
+    def _step_loop(self):
+        x = self.x
+        y = self.y
+        vx = self.vx
+        vy = self.vy
+        size = self.size
+        hit = self.hit
+        width = self.width
+        height = self.height
+        clamp = self.clamp
+        for i in range(self.count):
+            nx = x[i] + vx[i]
+            ny = y[i] + vy[i]
+            max_x = width - size[i]
+            max_y = height - size[i]
+            bounced = 0
+            if nx < 0 or nx > max_x:
+                vx[i] = -vx[i]
+                if clamp:
+                    nx = -nx if nx < 0 else 2 * max_x - nx
+                    nx = 0 if nx < 0 else max_x if nx > max_x else nx
+                bounced = 1
+            if ny < 0 or ny > max_y:
+                vy[i] = -vy[i]
+                if clamp:
+                    ny = -ny if ny < 0 else 2 * max_y - ny
+                    ny = 0 if ny < 0 else max_y if ny > max_y else ny
+                bounced = 1
+            x[i] = nx
+            y[i] = ny
+            hit[i] = bounced
+
+    def _step_vectorised(self):
+        n = self.count
+        x = self._np_x[:n]
+        y = self._np_y[:n]
+        vx = self._np_vx[:n]
+        vy = self._np_vy[:n]
+        size = self._np_size[:n]
+        x += vx
+        y += vy
+        max_x = self.width - size
+        max_y = self.height - size
+        hit_x = np.maximum(x < 0, x > max_x)
+        hit_y = np.maximum(y < 0, y > max_y)
+        vx[:] = np.where(hit_x, -vx, vx)
+        vy[:] = np.where(hit_y, -vy, vy)
+        if self.clamp:
+            x[:] = np.clip(np.where(x < 0, -x, np.where(x > max_x, 2 * max_x - x, x)), 0, max_x)
+            y[:] = np.clip(np.where(y < 0, -y, np.where(y > max_y, 2 * max_y - y, y)), 0, max_y)
+        self._np_hit[:n] = np.maximum(hit_x, hit_y)
+
+    def overlaps(self, i, j):
+        """Return True if balls i and j overlap."""
+        dx = self.x[i] - self.x[j]
+        dy = self.y[i] - self.y[j]
+        reach = (self.size[i] + self.size[j]) / 2
+        return dx * dx + dy * dy < reach * reach
+
+    def contains(self, i, px, py):
+        """Return True if the point (px, py) is on ball i."""
+        radius = self.size[i] / 2
+        dx = px - self.x[i] - radius
+        dy = py - self.y[i] - radius
+        return dx * dx + dy * dy <= radius * radius
+
+    def find(self, px, py, candidates):
+        """Return the first ball in candidates that the point (px, py) is on, or -1."""
+        for i in candidates:
+            if self.contains(i, px, py):
+                return i
+        return -1
+
+    def separate(self, i, j):
+        """Push overlapping balls i and j apart, half the overlap each."""
+        dx = self.x[j] - self.x[i]
+        dy = self.y[j] - self.y[i]
+        distance2 = dx * dx + dy * dy
+        reach = (self.size[i] + self.size[j]) / 2
+        # Squared test first: the square root is only taken for balls that really touch
+        if distance2 >= reach * reach or distance2 == 0:
+            return
+        distance = distance2 ** 0.5
+        overlap = reach - distance
+        if overlap > 0:
+            scale = overlap / distance / 2
+            self.x[i] -= dx * scale
+            self.y[i] -= dy * scale
+            self.x[j] += dx * scale
+            self.y[j] += dy * scale
+
+    def swap_velocities(self, i, j):
+        """Exchange the velocities of balls i and j."""
+        vx = self.vx
+        vy = self.vy
+        vx[i], vx[j] = vx[j], vx[i]
+        vy[i], vy[j] = vy[j], vy[i]
+
+    def collide(self, i, j):
+        """
+        Resolve a contact between balls i and j during the last step, swapping their
+        velocities. Returns True if they touched.
+
+        Pairs closing slower than their combined radius per step are tested for overlap at
+        the end of the step. Faster pairs can pass through each other between steps, so they
+        get a swept test: rewind to the start of the step, solve for the time of impact,
+        bounce there and move on for the rest of the step.
+        """
+        x = self.x
+        y = self.y
+        vx = self.vx
+        vy = self.vy
+        reach = (self.size[i] + self.size[j]) / 2
+        dvx = vx[j] - vx[i]
+        dvy = vy[j] - vy[i]
+        speed2 = dvx * dvx + dvy * dvy
+        # A ball that bounced off a wall this step didn't travel in a straight line
+        if speed2 <= reach * reach or self.hit[i] or self.hit[j]:
+            if not self.overlaps(i, j):
+                return False
+            self.separate(i, j)
+            self.swap_velocities(i, j)
+            return True
+
+        # Relative position at the start of the step; solve |s + d t| = reach for t in [0, 1]
+        sx = x[j] - x[i] - dvx
+        sy = y[j] - y[i] - dvy
+        b = sx * dvx + sy * dvy
+        c = sx * sx + sy * sy - reach * reach
+        if b >= 0:
+            # Moving apart, even if they started the step overlapping (after growth or a touch
+            # reversal); bouncing them would push them through each other
+            return False
+        if c < 0:
+            t = 0.0
+        else:
+            disc = b * b - speed2 * c
+            if disc < 0:
+                return False
+            # Only pairs that meet during this step get this far, so it's one root per contact
+            t = (-b - disc ** 0.5) / speed2
+            if t > 1:
+                return False
+
+        # Back both balls up to the point of impact, bounce, and spend the rest of the step
+        rest = 1 - t
+        x[i] -= vx[i] * rest
+        y[i] -= vy[i] * rest
+        x[j] -= vx[j] * rest
+        y[j] -= vy[j] * rest
+        self.swap_velocities(i, j)
+        x[i] += vx[i] * rest
+        y[i] += vy[i] * rest
+        x[j] += vx[j] * rest
+        y[j] += vy[j] * rest
+        return True
+
+    def reverse(self, i):
+        """Send ball i back the way it came."""
+        self.vx[i] = -self.vx[i]
+        self.vy[i] = -self.vy[i]
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel for items that need waking up after a delay.
+    - horizon: longest delay that will be scheduled, in seconds
+    - resolution: length of one wheel slot in seconds; timers fire up to this late
+
+    Each slot holds the items due in the ticks that map onto it, stored as (due tick, item)
+    pairs laid out flat. expire() only visits the slots that have come due since the last
+    call, so polling costs nothing for items whose timers haven't fired. An item whose slot
+    comes round before its tick, because it was scheduled more than a turn of the wheel ahead
+    of the last expire(), stays put until the turn it is due in; timers never fire early.
+    """
+
+    __slots__ = ("resolution", "slots", "tick")
+
+    def __init__(self, horizon, resolution=0.05):
+        self.resolution = resolution
+        # Rounded up, so a horizon-long timer fits in one turn
+        self.slots = [[] for _ in range(int(-(-horizon // resolution)) + 2)]
+        self.tick = 0
+
+    def schedule(self, item, when):
+        """Fire item at simulation time when (seconds)."""
+        tick = int(when / self.resolution) + 1
+        if tick <= self.tick:
+            tick = self.tick + 1
+        bucket = self.slots[tick % len(self.slots)]
+        bucket.append(tick)
+        bucket.append(item)
+
+    def expire(self, now, fired):
+        """Move every item due by now into the list fired."""
+        end = int(now / self.resolution)
+        slots = self.slots
+        while self.tick < end:
+            self.tick += 1
+            tick = self.tick
+            bucket = slots[tick % len(slots)]
+            if not bucket:
+                continue
+            # Fire what is due and close the rest up in place
+            kept = 0
+            for k in range(0, len(bucket), 2):
+                if bucket[k] <= tick:
+                    fired.append(bucket[k + 1])
+                else:
+                    bucket[kept] = bucket[k]
+                    bucket[kept + 1] = bucket[k + 1]
+                    kept += 2
+            del bucket[kept:]
+
+
+class Growth:
+    """
+    Grow-and-shrink settings for balls that change size when they hit a wall.
+    - step: pixels added or removed per wall hit
+    - min_size, max_size: diameter limits
+    - max_duration, min_duration: seconds spent at the largest and smallest size
+
+    Balls that reach a size limit are put on a shared TimerWheel; call poll() once per step
+    to move the balls whose time is up on to their next state.
+    """
+
+    __slots__ = ("step", "min_size", "max_size", "durations", "wheel", "fired")
+
+    def __init__(self, step, min_size, max_size, max_duration, min_duration):
+        self.step = step
+        self.min_size = min_size
+        self.max_size = max_size
+        # Seconds to wait in each state before its timer fires, indexed by state
+        self.durations = (0, max_duration, 0, min_duration)
+        self.wheel = TimerWheel(max(max_duration, min_duration))
+        self.fired = []
+
+    def enter(self, world, i, state, now):
+        """Put ball i into state, starting the state's timer if it has one."""
+        world.state[i] = state
+        if TIMER_STATE[state] >= 0:
+            self.wheel.schedule(i, now + self.durations[state])
+
+    def poll(self, world, now):
+        """Apply the timed transitions that are due."""
+        fired = self.fired
+        self.wheel.expire(now, fired)
+        for i in fired:
+            self.enter(world, i, TIMER_STATE[world.state[i]], now)
+        del fired[:]
+
+
+class Ball:
+    """
+    A ball in a BallWorld and the display object that shows it.
+    - world: the BallWorld the ball is added to
+    - sprite: display object for the ball (a Circle, or a TileGrid from BallSprites), already
+      in a display group
+    - pos, velocity, size: starting position (x, y), velocity (vx, vy) and diameter
+    - color: starting colour
+    - sprites: the BallSprites the sprite came from; required with growth, since a Circle
+      can't change size
+    - growth: a Growth to make the ball grow and shrink on wall hits
+    - colors: colours to pick from at random every hits_per_color wall hits
+
+    Physics lives in the world's arrays; a Ball only reacts to wall hits (update) and moves
+    its sprite (draw).
+    """
+
+    __slots__ = ("world", "index", "sprite", "sprites", "growth", "colors", "hits_per_color",
+                 "color", "hit_count", "extent")
+
+    def __init__(self, world, sprite, pos, velocity, size, color, sprites=None, growth=None,
+                 colors=None, hits_per_color=5):
+        if growth is not None and sprites is None:
+            raise ValueError("a growing Ball needs the BallSprites its sprite came from")
+        self.world = world
+        self.index = world.add(pos[0], pos[1], velocity[0], velocity[1], size, GROWING)
+        self.sprite = sprite
+        self.sprites = sprites
+        self.growth = growth
+        self.colors = colors
+        self.hits_per_color = hits_per_color
+        self.color = color
+        self.hit_count = 0
+        # Width of the sprite on screen: a sprite-sheet cell, or a circle's 2 * radius + 1
+        self.extent = sprites.cell if sprites is not None else int(size) // 2 * 2 + 1
+
+    def update(self, now):
+        """
+        Called after each world step with the simulation clock: react to wall hits. Timed
+        state changes are handled by Growth.poll().
+        """
+        if not self.world.hit[self.index]:
+            return
+        self.hit_count += 1
+        if self.colors is not None and self.hit_count >= self.hits_per_color:
+            self.change_color()
+        if self.growth is not None:
+            self.grow(now)
+
+    def draw(self, regions):
+        """Move the sprite to where the physics left the ball, if it moved a whole pixel."""
+        x = int(self.world.x[self.index])
+        y = int(self.world.y[self.index])
+        if regions.move(self.index, x, y, self.extent, self.extent):
+            self.sprite.x = x
+            self.sprite.y = y
+
+    def grow(self, now):
+        world = self.world
+        i = self.index
+        growth = self.growth
+        state = world.state[i]
+        direction = GROW_DIRECTION[state]
+        if direction == 0:
+            return
+        size = world.size[i] + direction * growth.step
+        if growth.min_size <= size <= growth.max_size:
+            world.size[i] = size
+            self.sprites.set_size(self.sprite, size)
+        else:
+            growth.enter(world, i, LIMIT_STATE[state], now)
+
+    def change_color(self):
+        self.color = self.colors[random.randrange(len(self.colors))]
+        if self.sprites is not None:
+            self.sprites.set_color(self.sprite, self.color)
+        else:
+            self.sprite.fill = self.color
+        self.hit_count = 0
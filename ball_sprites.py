@@ -0,0 +1,63 @@
+"""
+Title: Ball Sprites
+
+About: Pre-rendered ball sprites for the PyPortal bouncing-ball programs. Every diameter
+from the smallest to the largest ball is drawn once into a shared sprite sheet, and each
+ball is a single TileGrid that switches tiles as it grows or shrinks.
+"""
+import displayio
+
+
+class BallSprites:
+    """
+    Shared sprite sheet holding one filled circle per diameter.
+    - min_size, max_size: smallest and largest ball diameter in pixels
+
+    Tile n of the sheet holds a circle of diameter min_size + n drawn in the top-left corner
+    of a max_size square, so a ball's TileGrid stays where it is when it changes size.
+    Colour 0 is transparent and colour 1 is the ball, which gets its own two-entry palette.
+    """
+
+    def __init__(self, min_size, max_size):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cell = max_size
+        count = max_size - min_size + 1
+        self.sheet = displayio.Bitmap(self.cell * count, self.cell, 2)
+        for tile in range(count):
+            self._draw_circle(tile * self.cell, min_size + tile)
+
+    def _draw_circle(self, left, diameter):
+        center = (diameter - 1) / 2
+        limit = (diameter / 2) ** 2
+        for py in range(diameter):
+            for px in range(diameter):
+                if (px - center) ** 2 + (py - center) ** 2 <= limit:
+                    self.sheet[left + px, py] = 1
+
+    def tile_for(self, size):
+        """Return the sheet tile index for a ball diameter."""
+        size = int(size)
+        if size < self.min_size:
+            size = self.min_size
+        elif size > self.max_size:
+            size = self.max_size
+        return size - self.min_size
+
+    def create(self, size, color, x, y):
+        """Return a new one-tile TileGrid showing a ball of the given size and colour."""
+        palette = displayio.Palette(2)
+        palette[1] = color
+        palette.make_transparent(0)
+        return displayio.TileGrid(self.sheet, pixel_shader=palette, width=1, height=1,
+                                  tile_width=self.cell, tile_height=self.cell,
+                                  default_tile=self.tile_for(size), x=int(x), y=int(y))
+
+    def set_size(self, sprite, size):
+        """Show a different diameter without touching the display group."""
+        sprite[0] = self.tile_for(size)
+
+    @staticmethod
+    def set_color(sprite, color):
+        """Recolour a ball in place."""
+        sprite.pixel_shader[1] = color
@@ -0,0 +1,145 @@
+"""
+Title: BallWorld Benchmark
+
+About: Compares the old per-object tuple update used by the ball programs with the batched
+BallWorld step, reporting time and bytes allocated per frame. Runs on desktop Python
+(python3 benchmarks/bench_ball_world.py) or on the PyPortal next to ball_engine.py and harness.py.
+The allocation figure is the one that matters on the PyPortal, where every new tuple or
+float lands on the GC heap; desktop Python recycles most of them through free lists.
+"""
+import random
+
+from harness import measure
+import ball_engine
+from ball_engine import BallWorld, TimerWheel
+
+DISPLAY_WIDTH = 320
+DISPLAY_HEIGHT = 240
+NUM_BALLS = 200
+# Ball count of the programs, and the most a step() of that many balls may allocate. Only the
+# desktop allocates anything, from float free-list noise; on the PyPortal this is 0
+PROGRAM_BALLS = 10
+ALLOCATION_LIMIT = 128
+BALL_SPEED = 7
+BALL_SIZE = 10
+FRAMES = 200
+# Physics rates and timer durations (seconds) for the timer wheel check
+TIMER_RATES = (60, 30, 20, 7, 2)
+TIMER_DURATIONS = (0.3, 1, 5)
+
+
+class TupleBall:
+    """The pre-BallWorld update, minus the display calls."""
+
+    def __init__(self, pos, velocity, size):
+        self.size = size
+        self.position = pos
+        self.velocity = velocity
+
+    def update(self):
+        x, y = self.position
+        vx, vy = self.velocity
+        x += vx
+        y += vy
+        if x < 0 or x > DISPLAY_WIDTH - self.size:
+            vx = -vx
+            x = max(0, min(x, DISPLAY_WIDTH - self.size))
+        if y < 0 or y > DISPLAY_HEIGHT - self.size:
+            vy = -vy
+            y = max(0, min(y, DISPLAY_HEIGHT - self.size))
+        self.position = (x, y)
+        self.velocity = (vx, vy)
+
+
+def starting_balls(count=NUM_BALLS):
+    random.seed(1)
+    return [((random.uniform(0, DISPLAY_WIDTH - BALL_SIZE), random.uniform(0, DISPLAY_HEIGHT - BALL_SIZE)),
+             (random.uniform(-BALL_SPEED, BALL_SPEED), random.uniform(-BALL_SPEED, BALL_SPEED)))
+            for _ in range(count)]
+
+
+def make_world(count):
+    world = BallWorld(count, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+    for pos, velocity in starting_balls(count):
+        world.add(pos[0], pos[1], velocity[0], velocity[1], BALL_SIZE)
+    return world
+
+
+def check_timer_wheel(hz, duration, steps=1000):
+    """
+    Schedule a timer every physics step, then poll, as Ball.update() and Growth.poll() do, and
+    check that every timer fires at or after its time and at most a step and a slot late.
+    """
+    wheel = TimerWheel(duration)
+    due = {}
+    fired = []
+    for k in range(1, steps + 1):
+        now = k / hz
+        due[k] = now + duration
+        wheel.schedule(k, now + duration)
+        wheel.expire(now, fired)
+        for item in fired:
+            assert now >= due[item], "timer fired {:.3f} s early at {} Hz".format(due[item] - now, hz)
+            # (plus a microsecond for float rounding)
+            late = now - due[item] - 1 / hz - wheel.resolution
+            assert late <= 1e-6, "timer fired {:.3f} s late at {} Hz".format(late, hz)
+            del due[item]
+        del fired[:]
+
+
+def check_collision(x0, v0, x1, v1, touches):
+    """
+    Step two size-10 balls on a horizontal line and collide them; check whether they touched
+    and that they never end up having passed through each other.
+    """
+    world = BallWorld(2, DISPLAY_WIDTH, DISPLAY_HEIGHT)
+    world.add(x0, 100, v0, 0, 10)
+    world.add(x1, 100, v1, 0, 10)
+    world.step()
+    assert world.collide(0, 1) == touches, "balls at {} and {}: touched is not {}".format(x0, x1, touches)
+    assert world.x[0] < world.x[1], "balls at {} and {} passed through each other".format(x0, x1)
+
+
+def check_collisions():
+    # Fast and closing from apart: a swept bounce
+    check_collision(100, 20, 130, -20, True)
+    # Fast and closing while already overlapping: bounce at the start of the step
+    check_collision(100, 20, 105, -20, True)
+    # Fast and moving apart while overlapping (after growth or a touch reversal): left alone
+    check_collision(100, -20, 105, 20, False)
+    # Fast and moving apart from apart
+    check_collision(100, -20, 130, 20, False)
+
+
+def main():
+    check_collisions()
+    print("BallWorld.collide: fast pairs never pass through each other")
+    for hz in TIMER_RATES:
+        for duration in TIMER_DURATIONS:
+            check_timer_wheel(hz, duration)
+    print("TimerWheel: no timer early or late at {} Hz".format(", ".join(str(hz) for hz in TIMER_RATES)))
+
+    print("{} balls, {} frames".format(NUM_BALLS, FRAMES))
+
+    balls = [TupleBall(pos, velocity, BALL_SIZE) for pos, velocity in starting_balls()]
+
+    def tuple_frame():
+        for ball in balls:
+            ball.update()
+
+    measure("tuple Ball.update", tuple_frame, FRAMES)
+
+    world = make_world(NUM_BALLS)
+    measure("BallWorld loop", world._step_loop, FRAMES)
+
+    if ball_engine.np is not None:
+        measure("BallWorld vectorised", world._step_vectorised, FRAMES)
+
+    # The programs' worlds are far below VECTORISE_MIN_BALLS, so step() must take the loop
+    small = make_world(PROGRAM_BALLS)
+    allocated = measure("BallWorld.step, {} balls".format(PROGRAM_BALLS), small.step, FRAMES)
+    assert allocated <= ALLOCATION_LIMIT, "step() allocates {:.0f} bytes/frame".format(allocated)
+
+
+if __name__ == "__main__":
+    main()
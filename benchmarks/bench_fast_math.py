@@ -0,0 +1,178 @@
+"""
+Title: Fast Math Benchmark
+
+About: Compares float maths with the Q16 fixed-point helpers in fast_math.py on the work the
+animations do every frame: sine and cosine, rotating vertices, distance tests and moving
+balls. Reports time and bytes allocated per frame and the largest error of the fixed-point
+results against the float ones. Runs on desktop Python
+(python3 benchmarks/bench_fast_math.py) or on the PyPortal next to fast_math.py and
+harness.py, where the bytes per frame show which version touches the heap.
+"""
+from array import array
+import math
+import random
+
+from harness import measure
+import fast_math
+from fast_math import ANGLE_STEPS, FRACTION_BITS, ONE, to_fixed, within
+
+FRAMES = 100
+VERTICES = 200
+PAIRS = 200
+BALLS = 200
+DISPLAY_WIDTH = 320
+DISPLAY_HEIGHT = 240
+
+
+def bench_trig():
+    print("sin/cos of {} angles".format(ANGLE_STEPS))
+    radians = array("f", [2 * math.pi * i / ANGLE_STEPS for i in range(ANGLE_STEPS)])
+    out = array("f", [0] * ANGLE_STEPS)
+    fixed = array("l", [0] * ANGLE_STEPS)
+
+    def float_frame():
+        for i in range(ANGLE_STEPS):
+            out[i] = math.sin(radians[i]) + math.cos(radians[i])
+
+    def fixed_frame():
+        for i in range(ANGLE_STEPS):
+            fixed[i] = fast_math.sin(i) + fast_math.cos(i)
+
+    measure("math.sin/cos", float_frame, FRAMES)
+    measure("fast_math.sin/cos", fixed_frame, FRAMES)
+
+    # Table entries are rounded to the nearest Q16 step; arbitrary angles are also rounded
+    # to the nearest table step, which dominates
+    table_error = 0
+    angle_error = 0
+    for k in range(4 * ANGLE_STEPS):
+        r = 2 * math.pi * k / (4 * ANGLE_STEPS)
+        if k % 4 == 0:
+            table_error = max(table_error, abs(fast_math.sin(k // 4) / ONE - math.sin(r)))
+        angle_error = max(angle_error, abs(fast_math.sin(fast_math.angle(r)) / ONE - math.sin(r)))
+    print("    max error: {:.2e} at table angles, {:.2e} for any angle".format(
+        table_error, angle_error))
+
+
+def bench_transform():
+    print("rotating {} vertices".format(VERTICES))
+    random.seed(2)
+    xs = array("h", [random.randint(-100, 100) for _ in range(VERTICES)])
+    ys = array("h", [random.randint(-100, 100) for _ in range(VERTICES)])
+    zs = array("h", [random.randint(-100, 100) for _ in range(VERTICES)])
+    float_out = array("f", [0] * VERTICES)
+    fixed_out = array("h", [0] * VERTICES)
+    a = 0.7
+    b = 1.9
+    float_matrix = [math.cos(a) * math.cos(b), -math.sin(b), -math.sin(a) * math.cos(b)]
+    steps_a = fast_math.angle(a)
+    steps_b = fast_math.angle(b)
+    fixed_matrix = [fast_math.mul(fast_math.cos(steps_a), fast_math.cos(steps_b)),
+                    -fast_math.sin(steps_b),
+                    -fast_math.mul(fast_math.sin(steps_a), fast_math.cos(steps_b))]
+
+    def float_frame():
+        m0, m1, m2 = float_matrix
+        for i in range(VERTICES):
+            float_out[i] = m0 * xs[i] + m1 * ys[i] + m2 * zs[i]
+
+    def fixed_frame():
+        m0, m1, m2 = fixed_matrix
+        for i in range(VERTICES):
+            fixed_out[i] = (m0 * xs[i] + m1 * ys[i] + m2 * zs[i]) >> FRACTION_BITS
+
+    measure("float matrix", float_frame, FRAMES)
+    measure("Q16 matrix", fixed_frame, FRAMES)
+    float_frame()
+    fixed_frame()
+    error = max(abs(fixed_out[i] - float_out[i]) for i in range(VERTICES))
+    print("    max error: {:.2f} px for coordinates up to 100 px".format(error))
+
+
+def bench_distance():
+    print("{} distance tests".format(PAIRS))
+    random.seed(3)
+    dxs = array("h", [random.randint(-40, 40) for _ in range(PAIRS)])
+    dys = array("h", [random.randint(-40, 40) for _ in range(PAIRS)])
+    radius = 25
+    float_hits = bytearray(PAIRS)
+    fixed_hits = bytearray(PAIRS)
+
+    def sqrt_frame():
+        for i in range(PAIRS):
+            float_hits[i] = math.sqrt(dxs[i] ** 2 + dys[i] ** 2) <= radius
+
+    def squared_frame():
+        for i in range(PAIRS):
+            fixed_hits[i] = within(dxs[i], dys[i], radius)
+
+    measure("sqrt compare", sqrt_frame, FRAMES)
+    measure("squared compare", squared_frame, FRAMES)
+    sqrt_frame()
+    squared_frame()
+    print("    disagreements: {}".format(sum(1 for i in range(PAIRS) if float_hits[i] != fixed_hits[i])))
+
+
+def bench_integrator():
+    print("moving {} balls".format(BALLS))
+    random.seed(4)
+    start_x = [random.uniform(0, DISPLAY_WIDTH) for _ in range(BALLS)]
+    start_y = [random.uniform(0, DISPLAY_HEIGHT) for _ in range(BALLS)]
+    speed_x = [random.uniform(-5, 5) for _ in range(BALLS)]
+    speed_y = [random.uniform(-5, 5) for _ in range(BALLS)]
+    fx = array("f", start_x)
+    fy = array("f", start_y)
+    fvx = array("f", speed_x)
+    fvy = array("f", speed_y)
+    qx = array("l", [to_fixed(v) for v in start_x])
+    qy = array("l", [to_fixed(v) for v in start_y])
+    qvx = array("l", [to_fixed(v) for v in speed_x])
+    qvy = array("l", [to_fixed(v) for v in speed_y])
+    max_fx = float(DISPLAY_WIDTH)
+    max_fy = float(DISPLAY_HEIGHT)
+    max_qx = DISPLAY_WIDTH << FRACTION_BITS
+    max_qy = DISPLAY_HEIGHT << FRACTION_BITS
+
+    def float_frame():
+        for i in range(BALLS):
+            x = fx[i] + fvx[i]
+            y = fy[i] + fvy[i]
+            if x < 0 or x > max_fx:
+                fvx[i] = -fvx[i]
+                x = -x if x < 0 else 2 * max_fx - x
+            if y < 0 or y > max_fy:
+                fvy[i] = -fvy[i]
+                y = -y if y < 0 else 2 * max_fy - y
+            fx[i] = x
+            fy[i] = y
+
+    def fixed_frame():
+        for i in range(BALLS):
+            x = qx[i] + qvx[i]
+            y = qy[i] + qvy[i]
+            if x < 0 or x > max_qx:
+                qvx[i] = -qvx[i]
+                x = -x if x < 0 else 2 * max_qx - x
+            if y < 0 or y > max_qy:
+                qvy[i] = -qvy[i]
+                y = -y if y < 0 else 2 * max_qy - y
+            qx[i] = x
+            qy[i] = y
+
+    measure("float positions", float_frame, FRAMES)
+    measure("Q16 positions", fixed_frame, FRAMES)
+    # Both ran the same number of frames, so the positions should still agree
+    error = max(max(abs(qx[i] / ONE - fx[i]), abs(qy[i] / ONE - fy[i])) for i in range(BALLS))
+    print("    max drift after {} frames: {:.4f} px".format(2 * FRAMES, error))
+
+
+def main():
+    print("{} frames per test".format(FRAMES))
+    bench_trig()
+    bench_transform()
+    bench_distance()
+    bench_integrator()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Title: Primality Benchmark
+
+About: Compares the trial-division is_prime() that prime.py used to have with
+primality.is_prime() on runs of consecutive numbers at increasing sizes, and checks that the
+two agree wherever the old one finishes in reasonable time. Runs on desktop Python
+(python3 benchmarks/bench_primality.py) or on the PyPortal next to primality.py,
+prime_sieve.py and harness.py.
+"""
+import sys
+import time
+
+import harness  # puts the repo root on the import path
+import primality
+
+CANDIDATES = 200
+# The old function needs about a million divisions per number at 1e12; fine on a desktop,
+# many minutes on the PyPortal
+DESKTOP = sys.implementation.name == "cpython"
+
+# Starting points, and whether the old function is still quick enough to run there
+RANGES = [
+    (10 ** 4, True),
+    (10 ** 6, True),
+    (10 ** 9, True),
+    (10 ** 12, DESKTOP),
+    (2 ** 61, False),
+    (10 ** 20, False),
+]
+
+
+def trial_division(n):
+    """The old prime.py test."""
+    if n <= 1:
+        return False
+    for i in range(2, int(n**0.5) + 1):
+        if n % i == 0:
+            return False
+    return True
+
+
+def measure(test, start):
+    """Test CANDIDATES numbers from start; returns (microseconds per number, primes found)."""
+    found = []
+    begin = time.monotonic()
+    for n in range(start, start + CANDIDATES):
+        if test(n):
+            found.append(n)
+    return (time.monotonic() - begin) / CANDIDATES * 1e6, found
+
+
+def main():
+    print("{} consecutive numbers per range".format(CANDIDATES))
+    print("{:>22} {:>16} {:>16} {:>8}".format("from", "old us/number", "new us/number", "primes"))
+    for start, run_old in RANGES:
+        new_time, new_found = measure(primality.is_prime, start)
+        old_text = "-"
+        if run_old:
+            old_time, old_found = measure(trial_division, start)
+            if old_found != new_found:
+                print("MISMATCH from {}: {} vs {}".format(start, old_found, new_found))
+            old_text = "{:.1f}".format(old_time)
+        print("{:>22} {:>16} {:>16.1f} {:>8}".format(start, old_text, new_time, len(new_found)))
+
+
+if __name__ == "__main__":
+    main()
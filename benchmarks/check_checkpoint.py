@@ -0,0 +1,115 @@
+"""
+Title: Checkpoint Check
+
+About: Exercises checkpoint.py the way prime.py uses it, in a temporary directory on desktop
+Python: save and load, resuming a prime search part way through, the rename fallback, a
+damaged or cut-short save file, and a location that can't be written. Fails with an
+AssertionError if anything misbehaves. Desktop Python only:
+    python3 benchmarks/check_checkpoint.py
+"""
+import contextlib
+import io
+import os
+import tempfile
+
+import harness  # puts the repo root on the import path
+from checkpoint import Checkpoint
+from prime_sieve import primes
+
+NAME = "prime_checkpoint.txt"
+PRIMES = 5000
+STOP_AFTER = 1234
+
+
+def check_round_trip(directory):
+    checkpoint = Checkpoint(directory, NAME, interval=10)
+    assert checkpoint.load() is None, "a new directory has no checkpoint"
+    assert not checkpoint.due(0), "the first save waits a whole interval"
+    assert checkpoint.due(10)
+    checkpoint.save({"next": 100, "count": 25}, 10)
+    assert checkpoint.writes == 1
+    checkpoint.save({"next": 100, "count": 25}, 20)
+    assert checkpoint.writes == 1, "an unchanged state is not written again"
+    assert Checkpoint(directory, NAME).load() == {"next": 100, "count": 25}
+    assert not os.path.exists(checkpoint.temp), "the temporary file is renamed away"
+
+
+def check_resume(directory):
+    # Stop a search part way, as a reset would, then carry on from the checkpoint in a new
+    # Checkpoint, as prime.py does at boot
+    found = []
+    for prime in primes():
+        found.append(prime)
+        if len(found) == STOP_AFTER:
+            break
+    Checkpoint(directory, NAME).save({"next": found[-1] + 1, "count": len(found)}, 0)
+
+    state = Checkpoint(directory, NAME).load()
+    count = state["count"]
+    for prime in primes(state["next"]):
+        if count == PRIMES:
+            break
+        found.append(prime)
+        count += 1
+
+    expected = []
+    for prime in primes():
+        if len(expected) == PRIMES:
+            break
+        expected.append(prime)
+    assert found == expected, "the resumed search skipped or repeated primes"
+
+
+def check_fallbacks(directory):
+    checkpoint = Checkpoint(directory, NAME)
+    checkpoint.save({"next": 7, "count": 4}, 0)
+    with open(checkpoint.path) as file:
+        text = file.read()
+
+    # A save stopped after removing the old file and before the rename leaves only the
+    # temporary file
+    os.rename(checkpoint.path, checkpoint.temp)
+    assert Checkpoint(directory, NAME).load() == {"next": 7, "count": 4}, "temporary file is used"
+    os.remove(checkpoint.temp)
+
+    # Damaged: a flipped digit fails the checksum
+    with open(checkpoint.path, "w") as file:
+        file.write(text.replace("next 7", "next 8"))
+    assert Checkpoint(directory, NAME).load() is None, "a bad checksum is rejected"
+
+    # Cut short, with a good temporary file left from the interrupted save
+    with open(checkpoint.path, "w") as file:
+        file.write(text[:len(text) // 2])
+    with open(checkpoint.temp, "w") as file:
+        file.write(text)
+    assert Checkpoint(directory, NAME).load() == {"next": 7, "count": 4}, "falls back to the temporary file"
+
+    # Garbage in both
+    for path in (checkpoint.path, checkpoint.temp):
+        with open(path, "w") as file:
+            file.write("next seven\ncheck x\n")
+    assert Checkpoint(directory, NAME).load() is None, "unreadable files are rejected"
+
+
+def check_unwritable(directory):
+    # Stands in for a read-only CIRCUITPY: a folder that doesn't exist can't be written either,
+    # and unlike a chmod it also stops root
+    checkpoint = Checkpoint(os.path.join(directory, "missing"), NAME)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        checkpoint.save({"next": 7, "count": 4}, 0)
+    assert not checkpoint.enabled, "saving is switched off"
+    assert output.getvalue().startswith("Checkpoint disabled:"), "the reason is printed"
+    assert not checkpoint.due(10 ** 6), "no more saves are attempted"
+    checkpoint.save({"next": 11, "count": 5}, 10 ** 6)
+    assert checkpoint.writes == 0
+
+
+def main():
+    for check in (check_round_trip, check_resume, check_fallbacks, check_unwritable):
+        with tempfile.TemporaryDirectory() as directory:
+            check(directory)
+        print("{:<20} ok".format(check.__name__))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Title: Benchmark Harness
+
+About: Shared setup for the benchmark scripts. Importing it puts the repo root on the import
+path, so the scripts find the engines when run as python3 benchmarks/<script>.py, and
+measure() times a frame function and counts the bytes it allocates. On the PyPortal, copy
+this file next to the benchmark and the engines it uses.
+"""
+import gc
+import sys
+import time
+
+try:
+    sys.path.insert(0, __file__.rsplit("/", 2)[0] if "/" in __file__ else ".")
+except NameError:
+    pass
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def measure(name, frame, frames):
+    """Run frame() frames times, print time and bytes allocated per frame, return the bytes."""
+    gc.collect()
+    start = time.monotonic()
+    for _ in range(frames):
+        frame()
+    elapsed = time.monotonic() - start
+
+    allocated = 0
+    if tracemalloc is not None:
+        # Desktop: peak traced memory above the starting point catches short-lived objects
+        tracemalloc.start()
+        for _ in range(frames):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            frame()
+            allocated += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+    else:
+        # CircuitPython: with the collector off, mem_alloc counts every heap allocation
+        gc.disable()
+        for _ in range(frames):
+            base = gc.mem_alloc()
+            frame()
+            allocated += gc.mem_alloc() - base
+        gc.enable()
+    print("{:<24} {:>9.1f} us/frame {:>9.1f} bytes/frame".format(
+        name, elapsed / frames * 1e6, allocated / frames))
+    return allocated / frames
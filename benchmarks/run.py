@@ -0,0 +1,201 @@
+"""
+Title: Headless Benchmark Runner
+
+About: Runs the PyPortal programs on desktop Python against the stand-in modules in
+benchmarks/stubs, with a seeded random generator and a fixed number of iterations, and
+reports iterations per second, memory and the functions the time goes into. Time inside the
+programs is virtual: time.sleep() returns immediately and moves the clock forward, so the
+figures measure computation rather than waiting.
+
+Usage, from the repo root:
+    python3 benchmarks/run.py                 # every program
+    python3 benchmarks/run.py prime.py -n 500 # one program, 500 iterations
+"""
+import argparse
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import random
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+STUBS = os.path.join(HERE, "stubs")
+
+# Program, what counts as one iteration ("refresh" or "sleep"), default iteration budget
+PROGRAMS = [
+    ("3D_Cube.py", "refresh", 200),
+    ("Bouncing Balls Animation.py", "refresh", 300),
+    ("Advance Ball.py", "refresh", 300),
+    ("Advance Ball 02.py", "refresh", 300),
+    ("Bounce_Balls(Lastrun).py", "refresh", 300),
+    ("Game of Life.py", "sleep", 50),
+    # prime.py redraws at a fixed rate, so its figure is that rate; the time profile and the
+    # primes per second on its label are what change
+    ("prime.py", "refresh", 20),
+    ("matrix.py", "sleep", 200),
+]
+
+
+class BudgetExhausted(Exception):
+    """Raised from inside a program once it has run its iterations."""
+
+
+class VirtualClock:
+    """Replaces time.monotonic/monotonic_ns/sleep so sleeping costs no wall time."""
+
+    def __init__(self):
+        self.ns = 0
+        self.real_monotonic_ns = time.monotonic_ns
+        self.real_monotonic = time.monotonic
+        self.real_sleep = time.sleep
+
+    def install(self):
+        # Real time keeps passing too, so code that times itself still sees progress
+        self.ns = 0
+        self.start = self.real_monotonic_ns()
+        time.monotonic_ns = self.monotonic_ns
+        time.monotonic = self.monotonic
+        time.sleep = self.sleep
+
+    def uninstall(self):
+        time.monotonic_ns = self.real_monotonic_ns
+        time.monotonic = self.real_monotonic
+        time.sleep = self.real_sleep
+
+    def monotonic_ns(self):
+        return self.real_monotonic_ns() - self.start + self.ns
+
+    def monotonic(self):
+        return self.monotonic_ns() / 1e9
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.ns += int(seconds * 1e9)
+
+
+def forget_local_modules():
+    """Drop repo and stub modules between runs so each program starts fresh."""
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None) or ""
+        if filename.startswith(REPO) and not filename.startswith(os.path.join(HERE, "run")):
+            del sys.modules[name]
+
+
+def run_program(name, event, iterations, seed, clock, on_iteration=None):
+    """Run one program until it has done the given number of iterations."""
+    forget_local_modules()
+    random.seed(seed)
+    import board
+
+    count = [0]
+
+    def tick():
+        count[0] += 1
+        if on_iteration is not None:
+            on_iteration()
+        if count[0] >= iterations:
+            raise BudgetExhausted()
+
+    clock.install()
+    if event == "sleep":
+        virtual_sleep = time.sleep
+
+        def sleep(seconds):
+            virtual_sleep(seconds)
+            tick()
+
+        time.sleep = sleep
+    else:
+        display_refresh = board.DISPLAY.refresh
+
+        def refresh(**kwargs):
+            display_refresh(**kwargs)
+            tick()
+
+        board.DISPLAY.refresh = refresh
+
+    # Keep the programs' own serial output (frame statistics and so on) out of the report, and
+    # give programs that save state (prime.py's checkpoint) an empty directory of their own
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), tempfile.TemporaryDirectory() as scratch:
+            os.environ["PRIME_CHECKPOINT_DIR"] = scratch
+            runpy.run_path(os.path.join(REPO, name), run_name="__main__")
+    except BudgetExhausted:
+        pass
+    finally:
+        os.environ.pop("PRIME_CHECKPOINT_DIR", None)
+        clock.uninstall()
+    return count[0]
+
+
+def benchmark(name, event, iterations, seed, top):
+    clock = VirtualClock()
+
+    # Pass 1: plain timing
+    start = time.perf_counter()
+    done = run_program(name, event, iterations, seed, clock)
+    elapsed = time.perf_counter() - start
+
+    # Pass 2: memory; transient bytes is the peak above the starting point in each iteration
+    transient = [0]
+
+    def sample():
+        current, peak = tracemalloc.get_traced_memory()
+        transient[0] += peak - current
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    run_program(name, event, iterations, seed, clock, on_iteration=sample)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{}: {} iterations in {:.3f} s, {:.1f} it/s, peak {:.1f} KiB, {:.0f} transient bytes/it".format(
+        name, done, elapsed, done / elapsed, peak / 1024, transient[0] / max(done, 1)))
+
+    # Pass 3: per-function time, limited to code in the repo
+    if top:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        run_program(name, event, iterations, seed, clock)
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            if filename.startswith(REPO) and not filename.startswith(HERE):
+                rows.append((tottime, cumtime, calls, os.path.basename(filename), line, function))
+        rows.sort(reverse=True)
+        for tottime, cumtime, calls, filename, line, function in rows[:top]:
+            print("    {:>8.3f} s self {:>8.3f} s total {:>9} calls  {}:{}({})".format(
+                tottime, cumtime, calls, filename, line, function))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PyPortal programs headless.")
+    parser.add_argument("programs", nargs="*", help="program files to run (default: all)")
+    parser.add_argument("-n", "--iterations", type=int, help="iterations per program")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed")
+    parser.add_argument("--top", type=int, default=5, help="functions to list per program, 0 for none")
+    args = parser.parse_args()
+
+    sys.path[:0] = [STUBS, REPO]
+    selected = PROGRAMS
+    if args.programs:
+        names = [os.path.basename(p) for p in args.programs]
+        selected = [p for p in PROGRAMS if p[0] in names]
+        unknown = set(names) - {p[0] for p in selected}
+        if unknown:
+            parser.error("unknown program(s): " + ", ".join(sorted(unknown)))
+
+    for name, event, iterations in selected:
+        benchmark(name, event, args.iterations or iterations, args.seed, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Desktop stand-in for adafruit_display_shapes.circle."""
+from adafruit_display_shapes.rect import Rect
+
+
+class Circle(Rect):
+    def __init__(self, x0, y0, r, *, fill=None, outline=None, stroke=1):
+        super().__init__(x0 - r, y0 - r, 2 * r + 1, 2 * r + 1, fill=fill, outline=outline, stroke=stroke)
+        self.r = r
@@ -0,0 +1,14 @@
+"""Desktop stand-in for adafruit_display_shapes.line."""
+import displayio
+
+
+class Line(displayio.TileGrid):
+    def __init__(self, x0, y0, x1, y1, color):
+        self._palette = displayio.Palette(2)
+        self._palette.make_transparent(0)
+        self._palette[1] = color
+        width = abs(x1 - x0) + 1
+        height = abs(y1 - y0) + 1
+        super().__init__(displayio.Bitmap(width, height, 2), pixel_shader=self._palette,
+                         x=min(x0, x1), y=min(y0, y1))
+        self.color = color
@@ -0,0 +1,23 @@
+"""Desktop stand-in for adafruit_display_shapes.rect."""
+import displayio
+
+
+class Rect(displayio.TileGrid):
+    def __init__(self, x, y, width, height, *, fill=None, outline=None, stroke=1):
+        self._palette = displayio.Palette(3)
+        self._palette.make_transparent(0)
+        super().__init__(displayio.Bitmap(width, height, 3), pixel_shader=self._palette, x=x, y=y)
+        self.fill = fill
+        self.outline = outline
+
+    @property
+    def fill(self):
+        return self._palette[2]
+
+    @fill.setter
+    def fill(self, color):
+        if color is None:
+            self._palette.make_transparent(2)
+        else:
+            self._palette[2] = color
+            self._palette.make_opaque(2)
@@ -0,0 +1,10 @@
+"""Desktop stand-in for adafruit_display_text.label."""
+import displayio
+
+
+class Label(displayio.Group):
+    def __init__(self, font, *, text="", color=0xFFFFFF, x=0, y=0, scale=1, **kwargs):
+        super().__init__(scale=scale, x=x, y=y)
+        self.font = font
+        self.color = color
+        self.text = text
@@ -0,0 +1,13 @@
+"""Desktop stand-in for adafruit_esp32spi, returning a fixed set of networks from a scan."""
+
+
+class ESP_SPIcontrol:
+    def __init__(self, spi, cs_pin, ready_pin, reset_pin, gpio0_pin=None):
+        pass
+
+    def scan_networks(self):
+        return [
+            {"ssid": b"PyPortal-2G", "rssi": -42, "channel": 1},
+            {"ssid": b"Workshop", "rssi": -63, "channel": 6},
+            {"ssid": b"Neighbour", "rssi": -81, "channel": 11},
+        ]
@@ -0,0 +1,17 @@
+"""
+Desktop stand-in for adafruit_touchscreen. touch_point replays the points in touch_points
+(None meaning not touched), so a benchmark can script touches; by default nothing is touched.
+"""
+
+
+class Touchscreen:
+    def __init__(self, x1_pin, x2_pin, y1_pin, y2_pin, *, x_resistance=None, samples=4,
+                 z_threshold=10000, calibration=None, size=None):
+        self.size = size
+        self.touch_points = []
+
+    @property
+    def touch_point(self):
+        if self.touch_points:
+            return self.touch_points.pop(0)
+        return None
@@ -0,0 +1,45 @@
+"""
+Desktop stand-in for the PyPortal's board module: a 320x240 display that accepts groups and
+refreshes instantly, and placeholder pins for the touchscreen and ESP32 co-processor.
+"""
+
+
+class Display:
+    def __init__(self, width=320, height=240):
+        self.width = width
+        self.height = height
+        self.rotation = 0
+        self.brightness = 1.0
+        self.auto_refresh = True
+        self.root_group = None
+        self.refreshes = 0
+
+    def show(self, group):
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second=60, minimum_frames_per_second=0):
+        self.refreshes += 1
+        return True
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+DISPLAY = Display()
+
+TOUCH_XL = Pin("TOUCH_XL")
+TOUCH_XR = Pin("TOUCH_XR")
+TOUCH_YD = Pin("TOUCH_YD")
+TOUCH_YU = Pin("TOUCH_YU")
+ESP_CS = Pin("ESP_CS")
+ESP_BUSY = Pin("ESP_BUSY")
+ESP_RESET = Pin("ESP_RESET")
+
+
+def SPI():
+    return object()
@@ -0,0 +1,7 @@
+"""Desktop stand-in for CircuitPython's digitalio."""
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = False
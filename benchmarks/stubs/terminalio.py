@@ -0,0 +1,9 @@
+"""Desktop stand-in for CircuitPython's terminalio."""
+
+
+class _Font:
+    def get_bounding_box(self):
+        return (6, 14)
+
+
+FONT = _Font()
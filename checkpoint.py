@@ -0,0 +1,109 @@
+"""
+Title: Checkpoint
+
+About: Small crash-safe save file for long-running programs, so a reset or power cut only
+loses the work since the last save. A few named integers are written now and then as text
+with a checksum: first to a temporary file, which is then renamed over the real one, so a
+save cut short leaves the previous one readable. Saves are rate-limited and skipped when
+nothing changed, because the CIRCUITPY flash has no wear levelling. CircuitPython can only
+write to CIRCUITPY when boot.py remounts it (storage.remount("/", readonly=False)); without
+that, saving is switched off with a message on serial and the program carries on.
+"""
+import os
+
+
+def _checksum(text):
+    """Adler-32 style checksum of a string."""
+    a = 1
+    b = 0
+    for char in text:
+        a = (a + ord(char)) % 65521
+        b = (b + a) % 65521
+    return (b << 16) | a
+
+
+class Checkpoint:
+    """
+    Saves and restores a dict of integers.
+    - directory: folder for the file; "/" is the CIRCUITPY drive (any directory works on a
+      computer, e.g. a temporary one for trying it out)
+    - name: file name
+    - interval: least number of seconds between saves
+
+    writes counts the saves made so far.
+    """
+
+    def __init__(self, directory="/", name="checkpoint.txt", interval=900):
+        self.path = directory.rstrip("/") + "/" + name
+        self.temp = self.path + ".tmp"
+        self.interval = interval
+        self.last_save = None
+        self.saved = None
+        self.enabled = True
+        self.writes = 0
+
+    def _read(self, path):
+        """Return the state stored in path, or None if it is missing or damaged."""
+        try:
+            with open(path) as file:
+                text = file.read()
+        except OSError:
+            return None
+        index = text.rfind("check ")
+        if index < 0:
+            return None
+        body = text[:index]
+        try:
+            if int(text[index + 6:].strip()) != _checksum(body):
+                return None
+            state = {}
+            for line in body.split("\n"):
+                if line:
+                    key, value = line.split(" ")
+                    state[key] = int(value)
+        except ValueError:
+            return None
+        return state
+
+    def load(self):
+        """Return the last saved state, or None if there isn't one."""
+        # The temporary file only matters if a save stopped between removing the old file
+        # and renaming the new one
+        state = self._read(self.path)
+        if state is None:
+            state = self._read(self.temp)
+        self.saved = state
+        return state
+
+    def due(self, now):
+        """Return True if a save at time now (in seconds) would not be too soon."""
+        if not self.enabled:
+            return False
+        if self.last_save is None:
+            self.last_save = now
+        return now - self.last_save >= self.interval
+
+    def save(self, state, now):
+        """Write state (a dict of names to integers) unless it matches the last save."""
+        self.last_save = now
+        if not self.enabled or state == self.saved:
+            return
+        body = "".join("{} {}\n".format(key, state[key]) for key in sorted(state))
+        try:
+            with open(self.temp, "w") as file:
+                file.write(body + "check {}\n".format(_checksum(body)))
+            if hasattr(os, "sync"):
+                os.sync()
+            try:
+                os.rename(self.temp, self.path)
+            except OSError:
+                # FAT won't rename over an existing file
+                os.remove(self.path)
+                os.rename(self.temp, self.path)
+        except OSError as error:
+            # Most likely CIRCUITPY is read-only to code; carry on without saving
+            print("Checkpoint disabled:", error)
+            self.enabled = False
+            return
+        self.saved = dict(state)
+        self.writes += 1
@@ -0,0 +1,89 @@
+"""
+Title: Dirty Regions
+
+About: Manual-refresh rendering for the PyPortal animations. Auto-refresh is turned off and
+each sprite's previous and current bounding boxes are tracked, so a frame where nothing
+moved costs no SPI traffic at all and a frame where little moved only pushes the areas
+displayio marked as changed. When the changed area grows past a threshold the whole panel is
+pushed in one go instead, which is cheaper than many small windows.
+"""
+from array import array
+import displayio
+
+# Pixels per background bitmap pixel; keeps the full-screen background tiny in memory
+BACKGROUND_SCALE = 16
+
+
+class DirtyRegions:
+    """
+    Tracks the screen area touched by moving sprites and refreshes the display to match.
+    - display: the display to drive (auto_refresh is switched off)
+    - group: root group being shown; a full-screen background is inserted at the bottom
+    - capacity: number of sprites tracked, indexed 0 to capacity - 1
+    - full_refresh_fraction: fraction of the panel above which a full refresh is forced
+    - background: background colour
+    """
+
+    def __init__(self, display, group, capacity, full_refresh_fraction=0.5, background=0x000000):
+        display.auto_refresh = False
+        self.display = display
+        self.full_area = display.width * display.height
+        self.threshold = int(self.full_area * full_refresh_fraction)
+        self.x = array("h", [0] * capacity)
+        self.y = array("h", [0] * capacity)
+        self.w = array("h", [0] * capacity)
+        self.h = array("h", [0] * capacity)
+        # The first frame has to draw everything
+        self.area = self.full_area
+        self.full_refreshes = 0
+        self.partial_refreshes = 0
+        self.skipped = 0
+
+        # Recolouring this background between two shades that look the same on the panel
+        # marks the whole screen dirty, which is how a full refresh is forced
+        self.background = background
+        self.shade = 0
+        self.palette = displayio.Palette(1)
+        self.palette[0] = background
+        bitmap = displayio.Bitmap(display.width // BACKGROUND_SCALE + 1,
+                                  display.height // BACKGROUND_SCALE + 1, 1)
+        layer = displayio.Group(scale=BACKGROUND_SCALE)
+        layer.append(displayio.TileGrid(bitmap, pixel_shader=self.palette))
+        group.insert(0, layer)
+
+    def move(self, i, x, y, w, h):
+        """
+        Record sprite i at a new box. Returns False if nothing changed, so the caller can
+        leave the sprite alone.
+        """
+        px = self.x[i]
+        py = self.y[i]
+        pw = self.w[i]
+        ph = self.h[i]
+        if px == x and py == y and pw == w and ph == h:
+            return False
+        # Union of the old and new boxes: the old one needs erasing, the new one drawing
+        left = px if px < x else x
+        top = py if py < y else y
+        right = px + pw if px + pw > x + w else x + w
+        bottom = py + ph if py + ph > y + h else y + h
+        self.area += (right - left) * (bottom - top)
+        self.x[i] = x
+        self.y[i] = y
+        self.w[i] = w
+        self.h[i] = h
+        return True
+
+    def flush(self):
+        """Push this frame's changes to the panel."""
+        if self.area == 0:
+            self.skipped += 1
+            return
+        if self.area >= self.threshold:
+            self.shade ^= 1
+            self.palette[0] = self.background ^ self.shade
+            self.full_refreshes += 1
+        else:
+            self.partial_refreshes += 1
+        self.display.refresh(target_frames_per_second=None)
+        self.area = 0
@@ -0,0 +1,69 @@
+"""
+Title: Fast Math
+
+About: Fixed-point arithmetic for the PyPortal animations. Values are Q16 integers (the real
+value times 65536), angles are steps of a sine table instead of radians, and distance tests
+compare squares so no square root is needed. On CircuitPython, integers between -2**30 and
+2**30 are stored inside the object itself, so integer maths in that range never touches the
+heap: a Q16 fraction (-1 to 1) times a plain integer below 2**14 stays in range, and so does
+a sum of three such products while each integer is below about 5000.
+"""
+from array import array
+import math
+
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+
+# A full turn is ANGLE_STEPS table steps
+ANGLE_STEPS = 1024
+ANGLE_MASK = ANGLE_STEPS - 1
+QUARTER_TURN = ANGLE_STEPS // 4
+
+# Q16 sine of every table step
+SINE = array("l", [int(round(math.sin(2 * math.pi * i / ANGLE_STEPS) * ONE))
+                   for i in range(ANGLE_STEPS)])
+
+
+def to_fixed(value):
+    """Convert a number to Q16, rounding to the nearest step."""
+    return int(value * ONE + (0.5 if value >= 0 else -0.5))
+
+
+def to_float(value):
+    """Convert a Q16 value back to a float."""
+    return value / ONE
+
+
+def mul(a, b):
+    """Multiply two Q16 values."""
+    return (a * b) >> FRACTION_BITS
+
+
+def div(a, b):
+    """Divide Q16 value a by Q16 value b."""
+    return (a << FRACTION_BITS) // b
+
+
+def angle(radians):
+    """Convert an angle in radians to table steps."""
+    return int(round(radians * ANGLE_STEPS / (2 * math.pi))) & ANGLE_MASK
+
+
+def sin(steps):
+    """Q16 sine of an angle in table steps; any integer angle is accepted."""
+    return SINE[steps & ANGLE_MASK]
+
+
+def cos(steps):
+    """Q16 cosine of an angle in table steps; any integer angle is accepted."""
+    return SINE[(steps + QUARTER_TURN) & ANGLE_MASK]
+
+
+def distance2(dx, dy):
+    """Squared length of (dx, dy)."""
+    return dx * dx + dy * dy
+
+
+def within(dx, dy, distance):
+    """Return True if (dx, dy) is no longer than distance, without a square root."""
+    return dx * dx + dy * dy <= distance * distance
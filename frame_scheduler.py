@@ -0,0 +1,112 @@
+"""
+Title: Frame Scheduler
+
+About: Fixed-timestep game loop for the PyPortal animations. Physics runs in fixed steps of
+1 / physics_hz seconds no matter how long drawing takes, and rendering happens at most
+render_fps times a second; when a frame runs late the next render slot is skipped rather
+than slowing the simulation down.
+"""
+import time
+
+# Nanosecond clock when available, so long uptimes don't lose float precision
+try:
+    _clock = time.monotonic_ns
+    _TICKS_PER_SECOND = 1000000000
+except AttributeError:
+    _clock = time.monotonic
+    _TICKS_PER_SECOND = 1
+
+
+def _ticks(seconds):
+    """Convert seconds to clock ticks."""
+    if _TICKS_PER_SECOND == 1:
+        return seconds
+    return int(seconds * _TICKS_PER_SECOND)
+
+
+class FrameScheduler:
+    """
+    Fixed-timestep loop with frame pacing and dropped-frame accounting.
+    - physics_hz: physics steps per second of simulated time
+    - render_fps: target number of rendered frames per second
+    - max_steps: most physics steps run before a render; any backlog beyond that is dropped
+    - report_interval: seconds between frame statistics printed to serial (0 to disable)
+
+    time is the simulation clock in seconds. It only advances in whole physics steps, so
+    timers driven from it (such as how long a ball stays at its largest size) run at the same
+    speed as the physics. After each render, rendered, dropped (render slots skipped
+    because the loop was behind) and late (renders that overran their frame budget) are
+    updated.
+    """
+
+    def __init__(self, physics_hz=30, render_fps=30, max_steps=4, report_interval=0):
+        self.physics_hz = physics_hz
+        self.dt = 1 / physics_hz
+        self.max_steps = max_steps
+        self.report_interval = report_interval
+        self._step_ticks = _ticks(1 / physics_hz)
+        self._render_ticks = _ticks(1 / render_fps)
+        self.steps = 0
+        self.time = 0.0
+        self.rendered = 0
+        self.dropped = 0
+        self.late = 0
+        self.lost_steps = 0
+        self._started = _clock()
+
+    def run(self, step, render):
+        """
+        Loop forever, calling step() once per physics step and render() once per frame.
+        """
+        step_ticks = self._step_ticks
+        render_ticks = self._render_ticks
+        report_ticks = _ticks(self.report_interval)
+        last = _clock()
+        self._started = last
+        next_render = last
+        next_report = last + report_ticks
+        accumulator = 0
+
+        while True:
+            now = _clock()
+            accumulator += now - last
+            last = now
+
+            # Catch the simulation up in fixed steps
+            count = 0
+            while accumulator >= step_ticks and count < self.max_steps:
+                step()
+                self.steps += 1
+                self.time = self.steps / self.physics_hz
+                accumulator -= step_ticks
+                count += 1
+            if accumulator >= step_ticks:
+                # Too far behind to catch up; let simulated time slip instead of spiralling
+                self.lost_steps += accumulator // step_ticks
+                accumulator %= step_ticks
+
+            now = _clock()
+            if now >= next_render:
+                # Skip any render slots that have already gone by
+                missed = (now - next_render) // render_ticks
+                self.dropped += missed
+                next_render += (missed + 1) * render_ticks
+                render()
+                self.rendered += 1
+                if _clock() - now > render_ticks:
+                    self.late += 1
+
+            if report_ticks and now >= next_report:
+                next_report = now + report_ticks
+                print(self.report())
+
+            # Sleep only if we are ahead of both the next step and the next render
+            wait = min(next_render, last + step_ticks - accumulator) - _clock()
+            if wait > 0:
+                time.sleep(wait / _TICKS_PER_SECOND)
+
+    def report(self):
+        """Return a one-line summary of the frame statistics so far."""
+        seconds = (_clock() - self._started) / _TICKS_PER_SECOND or 1
+        return "fps: {:.1f} rendered: {} dropped: {} late: {} lost steps: {}".format(
+            self.rendered / seconds, self.rendered, self.dropped, self.late, self.lost_steps)
@@ -0,0 +1,207 @@
+"""
+Title: Life Engine
+
+About: Bit-packed Conway's Game of Life on a torus. Each row of the board is one integer
+with bit x set when cell x is alive, and a whole row's next generation is worked out at once
+with bitwise adders instead of cell by cell. Runs on CircuitPython and on desktop Python.
+"""
+from array import array
+import random
+
+# Board hashes are kept to 30 bits so they stay small ints on CircuitPython
+HASH_MASK = 0x3FFFFFFF
+
+
+def _full_add(a, b, c):
+    """Bitwise full adder: returns (sum, carry) for three bitsets."""
+    partial = a ^ b
+    return partial ^ c, (a & b) | (c & partial)
+
+
+def next_row(above, row, below, width, mask):
+    """
+    Return the next generation of row, given the rows above and below it.
+    - width: number of cells in a row
+    - mask: (1 << width) - 1
+
+    The eight neighbour bitsets (each row shifted west and east, wrapping around) are summed
+    bit-parallel into ones, twos and fours bits; a cell lives if its count is 3, or 2 and it
+    was already alive.
+    """
+    top = width - 1
+    above_w = ((above << 1) & mask) | (above >> top)
+    above_e = (above >> 1) | ((above & 1) << top)
+    row_w = ((row << 1) & mask) | (row >> top)
+    row_e = (row >> 1) | ((row & 1) << top)
+    below_w = ((below << 1) & mask) | (below >> top)
+    below_e = (below >> 1) | ((below & 1) << top)
+
+    sum_above, carry_above = _full_add(above_w, above, above_e)
+    sum_below, carry_below = _full_add(below_w, below, below_e)
+    sum_row = row_w ^ row_e
+    carry_row = row_w & row_e
+
+    ones, carry_ones = _full_add(sum_above, sum_below, sum_row)
+    partial_twos, fours_a = _full_add(carry_above, carry_below, carry_row)
+    twos = partial_twos ^ carry_ones
+    fours = fours_a ^ (partial_twos & carry_ones)
+    # A count of 8 leaves ones, twos and fours all clear, so it needs no special case
+    return twos & (ones | row) & ~fours
+
+
+def row_hash(y, row):
+    """Hash of row y holding row; an empty row hashes to 0."""
+    if not row:
+        return 0
+    h = (hash(row) ^ (y * 0x9E3779B1)) & HASH_MASK
+    h ^= h >> 15
+    h = (h * 0x2C1B3C6D) & HASH_MASK
+    return h ^ (h >> 13)
+
+
+def step_rows(rows, width, start=0, stop=None):
+    """
+    Return the next generation of rows[start:stop] of a toroidal board, reading the rows
+    just outside that range (wrapping at the top and bottom) as neighbours.
+    """
+    height = len(rows)
+    if stop is None:
+        stop = height
+    mask = (1 << width) - 1
+    return [next_row(rows[y - 1], rows[y], rows[(y + 1) % height], width, mask)
+            for y in range(start, stop)]
+
+
+class LifeBoard:
+    """
+    A width x height toroidal Game of Life board.
+    - width, height: board size in cells
+
+    rows[y] holds row y as a bitset; bit x is cell (x, y). changed lists (y, flipped) for
+    every row that changed in the last step (or since, through randomize() and set()), where
+    flipped has a bit set for each cell of the row that flipped, so a renderer only has to
+    touch those cells.
+
+    hash is a hash of the whole board and live_rows the number of rows with a live cell; both
+    are kept up to date as rows change, so neither costs a pass over the board.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.changed = []
+        self.hash = 0
+        self.live_rows = 0
+        # Rows whose neighbourhood changed last generation; only these can change next
+        self.active = bytearray(height)
+        self._idle = bytes(height)
+
+    def _changed(self, y, row):
+        """Replace row y and record which of its cells flipped."""
+        old = self.rows[y]
+        flipped = old ^ row
+        if flipped:
+            self.rows[y] = row
+            self.hash ^= row_hash(y, old) ^ row_hash(y, row)
+            if not old:
+                self.live_rows += 1
+            elif not row:
+                self.live_rows -= 1
+            self.changed.append((y, flipped))
+            active = self.active
+            active[y - 1] = 1
+            active[y] = 1
+            active[(y + 1) % self.height] = 1
+
+    def randomize(self):
+        """Fill the board with random cells, about half of them alive."""
+        for y in range(self.height):
+            row = 0
+            # getrandbits is limited to 32 bits on CircuitPython, so build rows in chunks
+            for shift in range(0, self.width, 16):
+                row |= random.getrandbits(16) << shift
+            self._changed(y, row & self.mask)
+
+    def get(self, x, y):
+        """Return 1 if cell (x, y) is alive, otherwise 0."""
+        return (self.rows[y] >> x) & 1
+
+    def set(self, x, y, alive):
+        if alive:
+            self._changed(y, self.rows[y] | 1 << x)
+        else:
+            self._changed(y, self.rows[y] & ~(1 << x))
+
+    def population(self):
+        """Return the number of live cells."""
+        return sum(bin(row).count("1") for row in self.rows)
+
+    def step(self):
+        """
+        Advance the board one generation. Only rows next to a row that changed last time are
+        evaluated, so a board that has mostly settled costs little.
+        """
+        rows = self.rows
+        width = self.width
+        mask = self.mask
+        height = self.height
+        active = self.active
+        # Work out every new row before replacing any, since neighbours read the old rows
+        updates = []
+        for y in range(height):
+            if active[y]:
+                row = next_row(rows[y - 1], rows[y], rows[(y + 1) % height], width, mask)
+                if row != rows[y]:
+                    updates.append((y, row))
+        active[:] = self._idle
+        self.changed = []
+        for y, row in updates:
+            self._changed(y, row)
+
+
+class CycleDetector:
+    """
+    Spots a Life board that has died out or settled into a still life or oscillator.
+    - max_period: longest repeating period detected
+
+    The last max_period board hashes are kept in a ring, so each check is a short scan with
+    no allocation. After settled() returns True, period holds the period found (1 for a
+    still life, 0 if the board died out); a settled board can keep being checked without
+    reset() and reports the same period every generation.
+    """
+
+    def __init__(self, max_period=6):
+        self.max_period = max_period
+        self.hashes = array("l", [-1] * max_period)
+        self.generation = 0
+        self.period = 0
+
+    def reset(self):
+        """Forget the history, e.g. after reseeding the board."""
+        for i in range(self.max_period):
+            self.hashes[i] = -1
+        self.generation = 0
+
+    def settled(self, board):
+        """Record board's current generation and return True if it has stopped evolving."""
+        if not board.live_rows:
+            self.period = 0
+            return True
+        h = board.hash
+        hashes = self.hashes
+        size = self.max_period
+        generation = self.generation
+        found = 0
+        for age in range(1, size + 1):
+            if hashes[(generation - age) % size] == h:
+                found = age
+                break
+        # Recorded even when a repeat was found, so the next check still lines up
+        hashes[generation % size] = h
+        self.generation = generation + 1
+        if found:
+            self.period = found
+            return True
+        return False
@@ -1,56 +1,122 @@
+import gc
+import sys
 import time
 import board
 import displayio
 from adafruit_display_text import label
 import terminalio
-import random
-
-# Function to create a matrix of dimensions 4x4 with random integers
-def create_matrix_4x4(max_value=150):
-    return [[random.randint(1, max_value) for _ in range(4)] for _ in range(4)]
-
-# Function to multiply two matrices
-def multiply_matrices(A, B):
-    # Resultant matrix of zeros
-    result = [[0 for _ in range(4)] for _ in range(4)]
-    for i in range(len(A)):
-        for j in range(len(B[0])):
-            for k in range(len(B)):
-                result[i][j] += A[i][k] * B[k][j]
-    return result
-
-# Convert matrix to string for display
-def matrix_to_string(matrix):
-    return '\n'.join([' '.join(map(str, row)) for row in matrix])
+from matrix_engine import BACKENDS, multiply, random_matrix
 
-# Display setup
-display = board.DISPLAY
-while True:
-    # Clear display
-    display.show(displayio.Group())
+# Settings
+MATRIX_SIZE = 4  # Rows and columns of the matrices multiplied; 32 and up work too
+SHOWN_SIZE = 4  # Rows and columns shown on screen; bigger matrices show their top-left corner
+DEMO_INTERVAL = 5  # Seconds between new matrices in the demo
+# Benchmark mode: instead of the demo, time multiplies of every size below with every backend
+# and log the results as CSV on serial (and to BENCH_CSV_FILE, if set)
+BENCHMARK = False
+BENCH_SIZES = (4, 8, 16, 32)  # The naive backend takes seconds per multiply at 32x32
+BENCH_SECONDS = 2  # Keep multiplying each size/backend pair for at least this long
+# Writing to CIRCUITPY needs storage.remount("/", readonly=False) in boot.py; None logs only
+# to serial
+BENCH_CSV_FILE = None
 
-    # Create two 4x4 matrices
-    A = create_matrix_4x4()
-    B = create_matrix_4x4()
+# Nanosecond clock when available, so short multiplies still get an accurate time
+try:
+    clock = time.monotonic_ns
+    TICKS_PER_SECOND = 1000000000
+except AttributeError:
+    clock = time.monotonic
+    TICKS_PER_SECOND = 1
 
-    # Multiply matrices
-    result = multiply_matrices(A, B)
+# Function to create a square matrix with random integers
+def create_matrix(size=MATRIX_SIZE, max_value=150):
+    return random_matrix(size, size, max_value)
+
+# Convert matrix (its top-left corner, if it is big) to string for display
+def matrix_to_string(matrix):
+    rows = min(matrix.rows, SHOWN_SIZE)
+    cols = min(matrix.cols, SHOWN_SIZE)
+    more = " ..." if matrix.cols > cols else ""
+    lines = [' '.join("{:.0f}".format(matrix[i, j]) for j in range(cols)) + more for i in range(rows)]
+    if matrix.rows > rows:
+        lines.append("...")
+    return '\n'.join(lines)
 
-    # Text setup for display
-    matrix_a_text = "Matrix A:\n" + matrix_to_string(A)
-    matrix_b_text = "Matrix B:\n" + matrix_to_string(B)
-    result_text = "Result:\n" + matrix_to_string(result)
+# Time multiplies of two size x size matrices; returns (multiplies done, seconds taken). Only
+# the multiplies are timed: the matrices are made beforehand and nothing is drawn meanwhile
+def time_multiply(size, backend):
+    a = create_matrix(size)
+    b = create_matrix(size)
+    gc.collect()
+    limit = BENCH_SECONDS * TICKS_PER_SECOND
+    repeats = 0
+    start = clock()
+    elapsed = 0
+    while repeats == 0 or elapsed < limit:
+        multiply(a, b, backend)
+        repeats += 1
+        elapsed = clock() - start
+    return repeats, elapsed / TICKS_PER_SECOND
+
+# Print a CSV line on serial and append it to BENCH_CSV_FILE if there is one
+def log_csv(line):
+    global BENCH_CSV_FILE
+    print(line)
+    if BENCH_CSV_FILE is None:
+        return
+    try:
+        with open(BENCH_CSV_FILE, "a") as file:
+            file.write(line + "\n")
+    except OSError as error:
+        # Most likely CIRCUITPY is read-only to code; keep logging to serial
+        print("CSV file disabled:", error)
+        BENCH_CSV_FILE = None
+
+# Display setup: one label, updated in place
+display = board.DISPLAY
+display.auto_refresh = False
+text_group = displayio.Group(scale=1, x=8, y=8)  # Adjust scale and position as needed
+text_area = label.Label(terminalio.FONT, text="Multiplying...", color=0x00FF00)
+text_group.append(text_area)
+display.show(text_group)
+display.refresh(target_frames_per_second=None)
 
-    # Combine all text
-    all_text = matrix_a_text + "\n\n" + matrix_b_text + "\n\n" + result_text
+if BENCHMARK:
+    # Which build produced the figures, so runs on different firmware can be compared
+    firmware = sys.implementation.name + " " + ".".join(str(part) for part in sys.implementation.version[:3])
+    log_csv("firmware,pass,backend,size,multiplies,ms_per_multiply,mflops")
+    run = 0
+    while True:
+        run += 1
+        results = []
+        for size in BENCH_SIZES:
+            for backend in BACKENDS:
+                # Draw before timing, never during
+                text_area.text = "\n".join(results + ["{} {}x{}...".format(backend, size, size)])
+                display.refresh(target_frames_per_second=None)
+                repeats, seconds = time_multiply(size, backend)
+                per_multiply = seconds / repeats
+                # A size x size multiply is size**3 multiply-adds, two floating-point operations each
+                mflops = 2 * size ** 3 / per_multiply / 1e6
+                log_csv("{},{},{},{},{},{:.3f},{:.4f}".format(
+                    firmware, run, backend, size, repeats, per_multiply * 1000, mflops))
+                results.append("{:>7} {:>2}x{:<2} {:>9.2f} ms {:>8.3f} MFLOPS".format(
+                    backend, size, size, per_multiply * 1000, mflops))
+        text_area.text = "\n".join(results + ["Pass {} done".format(run)])
+        display.refresh(target_frames_per_second=None)
+else:
+    while True:
+        # Create two MATRIX_SIZE x MATRIX_SIZE matrices
+        A = create_matrix()
+        B = create_matrix()
 
-    # Create label
-    text_area = label.Label(terminalio.FONT, text=all_text, color=0x00FF00)
-    text_group = displayio.Group(scale=1, x=8, y=8)  # Adjust scale and position as needed
-    text_group.append(text_area)
+        # Multiply matrices (with ulab when the firmware has it)
+        result = multiply(A, B)
 
-    # Show on display
-    display.show(text_group)
+        # Show all three on the label
+        text_area.text = ("Matrix A:\n" + matrix_to_string(A) + "\n\nMatrix B:\n" + matrix_to_string(B)
+                          + "\n\nResult:\n" + matrix_to_string(result))
+        display.refresh(target_frames_per_second=None)
 
-    # Refresh display and wait
-    time.sleep(5)
+        # Wait before the next pair
+        time.sleep(DEMO_INTERVAL)
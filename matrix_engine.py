@@ -0,0 +1,185 @@
+"""
+Title: Matrix Engine
+
+About: Matrices of any size for the PyPortal matrix demo. A Matrix keeps its elements in one
+flat float array with a shape and a row stride instead of a list of row lists, so it costs
+one object however big it is and sub-matrices can share storage. multiply() hands the work
+to ulab (CircuitPython) or NumPy (desktop) when one of them is installed, and otherwise uses
+a blocked pure-Python loop that reads B through a transposed copy so the inner loop walks
+both operands in order.
+"""
+from array import array
+import random
+
+# ulab on CircuitPython or NumPy on a computer, if either is installed
+try:
+    from ulab import numpy as np
+except ImportError:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+# Backend names accepted by multiply()
+NUMPY = "numpy"
+BLOCKED = "blocked"
+NAIVE = "naive"
+BACKENDS = (NUMPY, BLOCKED, NAIVE) if np is not None else (BLOCKED, NAIVE)
+
+# Rows and columns per block in the blocked multiply
+BLOCK_SIZE = 16
+
+
+class Matrix:
+    """
+    A rows x cols matrix of floats in a flat array.
+    - rows, cols: shape
+    - data: array("f") holding the elements (a zeroed one is made if omitted)
+    - stride: distance in data between the starts of two rows (defaults to cols)
+    - offset: position in data of element (0, 0)
+
+    Element (i, j) is data[offset + i * stride + j].
+    """
+
+    __slots__ = ("rows", "cols", "data", "stride", "offset")
+
+    def __init__(self, rows, cols, data=None, stride=None, offset=0):
+        self.rows = rows
+        self.cols = cols
+        self.data = array("f", bytes(4 * rows * cols)) if data is None else data
+        self.stride = cols if stride is None else stride
+        self.offset = offset
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    def __getitem__(self, index):
+        i, j = index
+        return self.data[self.offset + i * self.stride + j]
+
+    def __setitem__(self, index, value):
+        i, j = index
+        self.data[self.offset + i * self.stride + j] = value
+
+    def contiguous(self):
+        """Return this matrix with rows packed back to back, copying only if needed."""
+        if self.stride == self.cols and self.offset == 0 and len(self.data) == self.rows * self.cols:
+            return self
+        out = Matrix(self.rows, self.cols)
+        for i in range(self.rows):
+            start = self.offset + i * self.stride
+            out.data[i * self.cols:(i + 1) * self.cols] = self.data[start:start + self.cols]
+        return out
+
+    def view(self, row, col, rows, cols):
+        """Return the rows x cols sub-matrix starting at (row, col), sharing storage."""
+        return Matrix(rows, cols, self.data, self.stride, self.offset + row * self.stride + col)
+
+    def transpose(self):
+        """Return a new contiguous matrix holding the transpose."""
+        out = Matrix(self.cols, self.rows)
+        data = self.data
+        out_data = out.data
+        stride = self.stride
+        rows = self.rows
+        for i in range(rows):
+            start = self.offset + i * stride
+            for j in range(self.cols):
+                out_data[j * rows + i] = data[start + j]
+        return out
+
+    def to_rows(self):
+        """Return the matrix as a list of row lists."""
+        return [[self[i, j] for j in range(self.cols)] for i in range(self.rows)]
+
+
+def from_rows(rows):
+    """Build a Matrix from a list of row lists."""
+    out = Matrix(len(rows), len(rows[0]))
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            out[i, j] = value
+    return out
+
+
+def random_matrix(rows, cols, max_value=150):
+    """Return a rows x cols matrix of random whole numbers from 1 to max_value."""
+    out = Matrix(rows, cols)
+    data = out.data
+    for i in range(rows * cols):
+        data[i] = random.randint(1, max_value)
+    return out
+
+
+def _multiply_numpy(a, b):
+    a = a.contiguous()
+    b = b.contiguous()
+    float_type = np.float32 if hasattr(np, "float32") else np.float
+    left = np.frombuffer(a.data, dtype=float_type).reshape((a.rows, a.cols))
+    right = np.frombuffer(b.data, dtype=float_type).reshape((b.rows, b.cols))
+    # The product comes back as float32 too, so its bytes drop straight into an array("f")
+    product = np.dot(left, right)
+    return Matrix(a.rows, b.cols, array("f", product.tobytes()))
+
+
+def _multiply_blocked(a, b, block):
+    rows = a.rows
+    inner = a.cols
+    cols = b.cols
+    out = Matrix(rows, cols)
+    # Row j of the transpose is column j of B, so the inner loop reads both in order
+    b_t = b.transpose()
+    a_data = a.data
+    a_stride = a.stride
+    a_offset = a.offset
+    t_data = b_t.data
+    c_data = out.data
+    for i0 in range(0, rows, block):
+        i1 = min(i0 + block, rows)
+        for j0 in range(0, cols, block):
+            j1 = min(j0 + block, cols)
+            for k0 in range(0, inner, block):
+                k1 = min(k0 + block, inner)
+                for i in range(i0, i1):
+                    a_row = a_offset + i * a_stride
+                    c_row = i * cols
+                    for j in range(j0, j1):
+                        t_row = j * inner
+                        total = 0.0
+                        for k in range(k0, k1):
+                            total += a_data[a_row + k] * t_data[t_row + k]
+                        c_data[c_row + j] += total
+    return out
+
+
+def _multiply_naive(a, b):
+    out = Matrix(a.rows, b.cols)
+    for i in range(a.rows):
+        for j in range(b.cols):
+            total = 0.0
+            for k in range(a.cols):
+                total += a[i, k] * b[k, j]
+            out[i, j] = total
+    return out
+
+
+def multiply(a, b, backend=None, block=BLOCK_SIZE):
+    """
+    Return the matrix product a x b.
+    - backend: NUMPY, BLOCKED or NAIVE; the default is NUMPY when available, else BLOCKED
+    - block: block size for the BLOCKED backend
+    """
+    if a.cols != b.rows:
+        raise ValueError("can't multiply {}x{} by {}x{}".format(a.rows, a.cols, b.rows, b.cols))
+    if backend is None:
+        backend = BACKENDS[0]
+    if backend == NUMPY:
+        if np is None:
+            raise ValueError("numpy backend needs ulab or numpy")
+        return _multiply_numpy(a, b)
+    if backend == BLOCKED:
+        return _multiply_blocked(a, b, block)
+    if backend == NAIVE:
+        return _multiply_naive(a, b)
+    raise ValueError("unknown backend " + repr(backend))
@@ -0,0 +1,224 @@
+"""
+Title: Mesh Engine
+
+About: Wireframe meshes for the PyPortal 3D programs. A mesh is loaded from a small subset
+of the Wavefront .obj format ("v x y z" vertex lines and "f a b c ..." face lines, 1-based
+indices), edges shared between faces are stored once, and each frame every vertex is rotated
+and perspective-projected once into preallocated buffers. All of it is integer maths (a Q16
+rotation matrix, see fast_math.py), so a frame allocates nothing. Faces turned away from the
+viewer are culled, and only edges of a visible face are drawn, which removes about half the
+edges of a closed mesh before rasterising. The module does no drawing itself, so it runs the
+same on desktop Python.
+"""
+from array import array
+from fast_math import FRACTION_BITS
+
+
+class Mesh:
+    """
+    Vertices, faces and de-duplicated edges of a polygon mesh.
+    - vertices: list of (x, y, z) positions, rounded to whole pixels; keep them within
+      about +-5000 so the fixed-point transform stays in small integers
+    - faces: list of faces, each a tuple of vertex indices in counter-clockwise order seen
+      from outside the mesh
+
+    Face f uses vertex indices face_index[face_start[f]:face_start[f + 1]]. Edge e joins
+    edge_a[e] and edge_b[e] and borders faces edge_face0[e] and edge_face1[e] (-1 if the
+    edge is only used by one face).
+    """
+
+    def __init__(self, vertices, faces):
+        self.count = len(vertices)
+        self.x = array("h", [int(round(v[0])) for v in vertices])
+        self.y = array("h", [int(round(v[1])) for v in vertices])
+        self.z = array("h", [int(round(v[2])) for v in vertices])
+
+        self.face_start = array("H", [0])
+        self.face_index = array("H")
+        for face in faces:
+            self.face_index.extend(array("H", face))
+            self.face_start.append(len(self.face_index))
+        self.faces = len(faces)
+
+        # Each edge is stored once however many faces share it
+        self.edge_a = array("H")
+        self.edge_b = array("H")
+        self.edge_face0 = array("h")
+        self.edge_face1 = array("h")
+        seen = {}
+        for f, face in enumerate(faces):
+            for k in range(len(face)):
+                a = face[k]
+                b = face[(k + 1) % len(face)]
+                key = (a, b) if a < b else (b, a)
+                e = seen.get(key)
+                if e is None:
+                    seen[key] = len(self.edge_a)
+                    self.edge_a.append(key[0])
+                    self.edge_b.append(key[1])
+                    self.edge_face0.append(f)
+                    self.edge_face1.append(-1)
+                elif self.edge_face1[e] == -1:
+                    self.edge_face1[e] = f
+        self.edges = len(self.edge_a)
+
+
+def parse_mesh(lines, scale=1):
+    """Build a Mesh from .obj lines, multiplying every coordinate by scale."""
+    vertices = []
+    faces = []
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] == "v":
+            vertices.append((float(parts[1]) * scale, float(parts[2]) * scale,
+                             float(parts[3]) * scale))
+        elif parts[0] == "f":
+            face = []
+            for part in parts[1:]:
+                # Only the vertex index matters; texture and normal indices are ignored
+                index = int(part.split("/")[0])
+                face.append(index - 1 if index > 0 else len(vertices) + index)
+            faces.append(tuple(face))
+    return Mesh(vertices, faces)
+
+
+def load_mesh(path, scale=1):
+    """Load a Mesh from an .obj file."""
+    with open(path) as file:
+        return parse_mesh(file, scale)
+
+
+class MeshView:
+    """
+    Per-frame transform, projection and culling of a Mesh.
+    - mesh: the Mesh to show
+    - center_x, center_y: screen position of the mesh origin
+    - distance: distance from the viewer to the mesh origin; keep it larger than the mesh
+    - focal: perspective scale in pixels; points at the origin's depth are scaled by
+      focal / distance
+
+    After update(), screen_x and screen_y hold each vertex's screen position and
+    edge_visible flags the edges to draw. drawn_x, drawn_y and edge_drawn keep the previous
+    frame's so erase() can remove exactly what was drawn.
+    """
+
+    def __init__(self, mesh, center_x, center_y, distance=200, focal=200):
+        self.mesh = mesh
+        self.center_x = center_x
+        self.center_y = center_y
+        self.distance = distance
+        self.focal = focal
+        count = mesh.count
+        self.rotated_x = array("h", [0] * count)
+        self.rotated_y = array("h", [0] * count)
+        self.rotated_z = array("h", [0] * count)
+        self.screen_x = array("h", [0] * count)
+        self.screen_y = array("h", [0] * count)
+        self.drawn_x = array("h", [0] * count)
+        self.drawn_y = array("h", [0] * count)
+        self.face_visible = bytearray(mesh.faces)
+        self.edge_visible = bytearray(mesh.edges)
+        self.edge_drawn = bytearray(mesh.edges)
+
+    def transform(self, matrix):
+        """Rotate every vertex once by a row-major 3x3 matrix of Q16 values."""
+        mesh = self.mesh
+        xs = mesh.x
+        ys = mesh.y
+        zs = mesh.z
+        rotated_x = self.rotated_x
+        rotated_y = self.rotated_y
+        rotated_z = self.rotated_z
+        m0, m1, m2, m3, m4, m5, m6, m7, m8 = matrix
+        for i in range(mesh.count):
+            x = xs[i]
+            y = ys[i]
+            z = zs[i]
+            rotated_x[i] = (m0 * x + m1 * y + m2 * z) >> FRACTION_BITS
+            rotated_y[i] = (m3 * x + m4 * y + m5 * z) >> FRACTION_BITS
+            rotated_z[i] = (m6 * x + m7 * y + m8 * z) >> FRACTION_BITS
+
+    def project(self):
+        """Perspective-project the rotated vertices onto the screen."""
+        focal = self.focal
+        distance = self.distance
+        center_x = self.center_x
+        center_y = self.center_y
+        rotated_x = self.rotated_x
+        rotated_y = self.rotated_y
+        rotated_z = self.rotated_z
+        screen_x = self.screen_x
+        screen_y = self.screen_y
+        for i in range(self.mesh.count):
+            depth = distance + rotated_z[i]
+            screen_x[i] = center_x + rotated_x[i] * focal // depth
+            screen_y[i] = center_y + rotated_y[i] * focal // depth
+
+    def cull(self):
+        """Flag the faces turned towards the viewer and the edges that border one."""
+        mesh = self.mesh
+        face_start = mesh.face_start
+        face_index = mesh.face_index
+        screen_x = self.screen_x
+        screen_y = self.screen_y
+        face_visible = self.face_visible
+        for f in range(mesh.faces):
+            start = face_start[f]
+            if face_start[f + 1] - start < 3:
+                face_visible[f] = 1
+                continue
+            a = face_index[start]
+            b = face_index[start + 1]
+            c = face_index[start + 2]
+            # Winding of the projected face: front faces come out clockwise on screen,
+            # because screen y points down
+            ax = screen_x[a]
+            ay = screen_y[a]
+            area = (screen_x[b] - ax) * (screen_y[c] - ay) - (screen_y[b] - ay) * (screen_x[c] - ax)
+            face_visible[f] = area < 0
+
+        edge_face0 = mesh.edge_face0
+        edge_face1 = mesh.edge_face1
+        edge_visible = self.edge_visible
+        for e in range(mesh.edges):
+            other = edge_face1[e]
+            edge_visible[e] = face_visible[edge_face0[e]] or (other >= 0 and face_visible[other])
+
+    def update(self, matrix):
+        """Work out this frame's screen positions and visible edges for a Q16 rotation matrix."""
+        self.drawn_x[:] = self.screen_x
+        self.drawn_y[:] = self.screen_y
+        self.edge_drawn[:] = self.edge_visible
+        self.transform(matrix)
+        self.project()
+        self.cull()
+
+    def erase(self, line):
+        """Call line(x0, y0, x1, y1, 0) for every edge drawn last frame."""
+        mesh = self.mesh
+        edge_a = mesh.edge_a
+        edge_b = mesh.edge_b
+        drawn_x = self.drawn_x
+        drawn_y = self.drawn_y
+        edge_drawn = self.edge_drawn
+        for e in range(mesh.edges):
+            if edge_drawn[e]:
+                a = edge_a[e]
+                b = edge_b[e]
+                line(drawn_x[a], drawn_y[a], drawn_x[b], drawn_y[b], 0)
+
+    def draw(self, line, color=1):
+        """Call line(x0, y0, x1, y1, color) for every visible edge."""
+        mesh = self.mesh
+        edge_a = mesh.edge_a
+        edge_b = mesh.edge_b
+        screen_x = self.screen_x
+        screen_y = self.screen_y
+        edge_visible = self.edge_visible
+        for e in range(mesh.edges):
+            if edge_visible[e]:
+                a = edge_a[e]
+                b = edge_b[e]
+                line(screen_x[a], screen_y[a], screen_x[b], screen_y[b], color)
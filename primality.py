@@ -0,0 +1,78 @@
+"""
+Title: Primality
+
+About: Fast primality testing for large numbers. Candidates are first divided by a short
+table of small primes, which rejects most composites for the price of a few modulo
+operations; whatever survives gets a Miller-Rabin test with a fixed set of witnesses that is
+known to be exact for every number below 3.3e24 (which covers all 64-bit numbers), so the
+cost per candidate is a handful of modular powers instead of a trial division up to the
+square root. Everything is integer maths, so nothing depends on CircuitPython's 30-bit
+floats.
+"""
+from prime_sieve import WHEEL
+
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71,
+                73, 79, 83, 89, 97)
+
+# Witness sets that make Miller-Rabin exact below the given bound
+WITNESSES_32 = (2, 7, 61)  # n < 4,759,123,141
+WITNESSES_64 = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)  # n < 3.3e24
+LIMIT_32 = 4759123141
+
+# Three-argument pow is optional in CircuitPython builds
+try:
+    pow(2, 3, 5)
+    _pow_mod = pow
+except (TypeError, NotImplementedError):
+    def _pow_mod(base, exponent, modulus):
+        result = 1
+        base %= modulus
+        while exponent:
+            if exponent & 1:
+                result = result * base % modulus
+            base = base * base % modulus
+            exponent >>= 1
+        return result
+
+
+def is_prime(n):
+    """Return True if n is prime. Exact for every n below 3.3e24."""
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+        if p * p > n:
+            return True
+
+    # n - 1 = d * 2**s with d odd
+    d = n - 1
+    s = 0
+    while not d & 1:
+        d >>= 1
+        s += 1
+    for a in WITNESSES_32 if n < LIMIT_32 else WITNESSES_64:
+        x = _pow_mod(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def primes_from(start):
+    """Yield every prime >= start in increasing order, testing only numbers on the 2-3-5 wheel."""
+    for p in (2, 3, 5):
+        if p >= start:
+            yield p
+    base = max(start, 0) // 30 * 30
+    while True:
+        for residue in WHEEL:
+            n = base + residue
+            if n >= start and is_prime(n):
+                yield n
+        base += 30
@@ -1,37 +1,99 @@
+import os
 import time
 import board
 import displayio
 from adafruit_display_text import label
 import terminalio
+from prime_sieve import primes
+from primality import primes_from
+from checkpoint import Checkpoint
+
+# Settings
+DISPLAY_HZ = 10  # Screen updates per second; the search runs flat out in between
+SIEVE_LIMIT = 2 ** 30  # Sieve below this; above it each candidate gets a Miller-Rabin test
+CHECKPOINT_INTERVAL = 900  # Seconds between saves of the search position; saves wear the flash
+# Where the checkpoint is kept; PRIME_CHECKPOINT_DIR in settings.toml (or the environment on a
+# computer) overrides the CIRCUITPY root
+try:
+    CHECKPOINT_DIR = os.getenv("PRIME_CHECKPOINT_DIR") or "/"
+except AttributeError:
+    CHECKPOINT_DIR = "/"
+CLOCK_CHECKS_PER_DRAW = 8  # Clock reads per redraw interval; the clock isn't read for every prime
+
+# Nanosecond clock when available, so days of uptime don't lose float precision
+try:
+    clock = time.monotonic_ns
+    TICKS_PER_SECOND = 1000000000
+except AttributeError:
+    clock = time.monotonic
+    TICKS_PER_SECOND = 1
 
 # Setup display
 display = board.DISPLAY
 display_group = displayio.Group()
 display.show(display_group)
+display.auto_refresh = False
+
+# One label, updated in place
+text_area = label.Label(terminalio.FONT, text="Searching...", color=0x00FF00, x=10, y=30)
+display_group.append(text_area)
+
+# Function to show the search progress
+def display_progress(prime, count, rate):
+    text_area.text = f"Prime: {prime}\nCount: {count}\nPer second: {rate:.0f}"
+    display.refresh(target_frames_per_second=None)
+
+# Primes from start upwards. The sieve's arithmetic stays in CircuitPython's small integers
+# below 2**30 and its list of sieving primes stays small; beyond that, testing candidates one
+# at a time is cheaper
+def find_primes(start=2):
+    if start < SIEVE_LIMIT:
+        for prime in primes(start):
+            if prime >= SIEVE_LIMIT:
+                break
+            yield prime
+        start = SIEVE_LIMIT
+    yield from primes_from(start)
+
+# Pick up where the last run left off
+checkpoint = Checkpoint(CHECKPOINT_DIR, "prime_checkpoint.txt", CHECKPOINT_INTERVAL)
+state = checkpoint.load()
+start = 2
+count = 0
+if state:
+    start = state["next"]
+    count = state["count"]
+    text_area.text = f"Resuming from {start}..."
+    display.refresh(target_frames_per_second=None)
 
-# Function to create and display text
-def display_text(text, y=30):
-    # Clear the previous display group
-    while display_group:
-        display_group.pop()
-
-    text_area = label.Label(terminalio.FONT, text=text, color=0x00FF00, x=10, y=y)
-    display_group.append(text_area)
-    display.refresh()
-
-# Function to check if a number is prime
-def is_prime(n):
-    if n <= 1:
-        return False
-    for i in range(2, int(n**0.5) + 1):
-        if n % i == 0:
-            return False
-    return True
-
-# Main loop to calculate and display prime numbers
-current_number = 2
-while True:
-    if is_prime(current_number):
-        display_text(f"Prime: {current_number}")
-        #time.sleep(0.5)  # Add a small delay to see the primes
-    current_number += 1
+# Main loop: find primes as fast as the sieve goes and redraw DISPLAY_HZ times a second.
+# The clock is read every check_every primes, which follows the rate so that it is read about
+# CLOCK_CHECKS_PER_DRAW times per redraw whether primes come by the thousand or a few at a time
+interval = TICKS_PER_SECOND // DISPLAY_HZ if TICKS_PER_SECOND > 1 else 1 / DISPLAY_HZ
+check_every = 1
+countdown = 1
+last_count = count
+last_draw = clock()
+next_draw = last_draw + interval
+current_number = start - 1
+try:
+    for current_number in find_primes(start):
+        count += 1
+        countdown -= 1
+        if countdown:
+            continue
+        now = clock()
+        if now >= next_draw:
+            found = count - last_count
+            display_progress(current_number, count, found * TICKS_PER_SECOND / (now - last_draw))
+            check_every = max(1, found // CLOCK_CHECKS_PER_DRAW)
+            last_count = count
+            last_draw = now
+            next_draw = now + interval
+            seconds = now // TICKS_PER_SECOND
+            if checkpoint.due(seconds):
+                checkpoint.save({"next": current_number + 1, "count": count}, seconds)
+        countdown = check_every
+finally:
+    # Stopped from the serial console (or the search ended): save what we have
+    checkpoint.save({"next": current_number + 1, "count": count}, clock() // TICKS_PER_SECOND)
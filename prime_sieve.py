@@ -0,0 +1,80 @@
+"""
+Title: Prime Sieve
+
+About: Streaming segmented Sieve of Eratosthenes for the prime programs. Only numbers
+coprime to 2, 3 and 5 can be prime past 5, and there are exactly eight of those in every 30,
+so the sieve keeps one byte per 30 numbers with one bit per candidate. A fixed-size segment
+of those bytes is sieved at a time and its primes handed out in order, so the search runs as
+far as you like in the same buffer; the only thing that grows is the list of sieving primes
+up to the square root of the frontier.
+"""
+# Residues mod 30 that can be prime, in bit order within a sieve byte
+WHEEL = (1, 7, 11, 13, 17, 19, 23, 29)
+
+# Bit of each wheel residue within a sieve byte
+_BIT = bytearray(30)
+for _i, _residue in enumerate(WHEEL):
+    _BIT[_residue] = _i
+
+# Bytes per segment; each byte covers 30 numbers
+SEGMENT_BYTES = 4096
+
+
+def primes(start=2, segment_bytes=SEGMENT_BYTES):
+    """Yield every prime >= start in increasing order, without end."""
+    for p in (2, 3, 5):
+        if p >= start:
+            yield p
+
+    # Sieving primes from 7 up, found by trial division as the frontier needs them
+    base = []
+    candidate = 1  # Position on the wheel of the next possible sieving prime (7)
+
+    segment = bytearray(segment_bytes)
+    all_set = b"\xff" * segment_bytes
+    byte = max(start, 0) // 30
+    while True:
+        low = byte * 30
+        high = low + segment_bytes * 30
+
+        # Sieving primes are needed up to the square root of the end of the segment
+        while not base or base[-1] * base[-1] < high:
+            n = 30 * (candidate >> 3) + WHEEL[candidate & 7]
+            candidate += 1
+            for p in base:
+                if p * p > n:
+                    base.append(n)
+                    break
+                if n % p == 0:
+                    break
+            else:
+                base.append(n)
+
+        segment[:] = all_set
+        for p in base:
+            if p * p >= high:
+                break
+            # Cross off p * m for multipliers m on the wheel, starting at p * p. Multiples
+            # with the same m mod 30 fall on the same bit, every p bytes.
+            first = (low + p - 1) // p
+            if first < p:
+                first = p
+            for w in WHEEL:
+                j = (first - w + 29) // 30 if first > w else 0
+                value = p * (30 * j + w)
+                mask = 0xFF ^ (1 << _BIT[value % 30])
+                for k in range(value // 30 - byte, segment_bytes, p):
+                    segment[k] &= mask
+        if byte == 0:
+            segment[0] &= 0xFE  # 1 is not prime
+
+        for i in range(segment_bytes):
+            bits = segment[i]
+            if bits:
+                base_value = (byte + i) * 30
+                for b in range(8):
+                    if bits & (1 << b):
+                        n = base_value + WHEEL[b]
+                        if n >= start:
+                            yield n
+        byte += segment_bytes
@@ -0,0 +1,164 @@
+"""
+Title: Parallel Life Stepper
+
+About: Host-side Game of Life stepping for very large tori, for pre-computing and checking
+seeds off-device. The board lives in shared memory as packed rows and is split into bands of
+whole rows; each generation a multiprocessing pool steps the bands in parallel, each worker
+reading its band plus one halo row above and below, using the same next_row() as
+life_engine.py so the result is identical to LifeBoard. Desktop Python only:
+    python3 tools/life_parallel.py --width 4096 --height 4096 --generations 50 --check
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+# The engines live in the repo root, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from life_engine import LifeBoard, next_row, step_rows
+
+# Shared buffers as seen from inside a worker, attached once by the pool initializer
+_buffers = []
+
+
+def _attach(names):
+    for name in names:
+        block = shared_memory.SharedMemory(name=name)
+        _buffers.append((block, block.buf))
+
+
+def _step_band(task):
+    """Step rows start to stop of the source buffer into the other one; returns live cells."""
+    source, width, height, start, stop = task
+    src = _buffers[source][1]
+    dst = _buffers[1 - source][1]
+    row_bytes = (width + 7) // 8
+    mask = (1 << width) - 1
+
+    def read(y):
+        offset = (y % height) * row_bytes
+        return int.from_bytes(src[offset:offset + row_bytes], "little")
+
+    above = read(start - 1)
+    row = read(start)
+    live = 0
+    for y in range(start, stop):
+        below = read(y + 1)
+        new = next_row(above, row, below, width, mask)
+        offset = y * row_bytes
+        dst[offset:offset + row_bytes] = new.to_bytes(row_bytes, "little")
+        live += bin(new).count("1")
+        above = row
+        row = below
+    return live
+
+
+class ParallelLife:
+    """
+    A width x height toroidal Life board stepped by a pool of worker processes.
+    - width, height: board size in cells
+    - processes: worker processes (default: one per CPU)
+    - bands: number of row bands per generation (default: four per process, for balance)
+
+    Use as a context manager, or call close() to stop the pool and free the shared memory.
+    """
+
+    def __init__(self, width, height, processes=None, bands=None):
+        self.width = width
+        self.height = height
+        self.row_bytes = (width + 7) // 8
+        self.processes = processes or multiprocessing.cpu_count()
+        bands = min(height, bands or self.processes * 4)
+        edges = [height * i // bands for i in range(bands + 1)]
+        self.bands = [(edges[i], edges[i + 1]) for i in range(bands)]
+        self.generation = 0
+        self.population = 0
+        # Two buffers: each generation reads one and writes the other
+        self.blocks = [shared_memory.SharedMemory(create=True, size=height * self.row_bytes)
+                       for _ in range(2)]
+        self.source = 0
+        self.pool = multiprocessing.Pool(self.processes, _attach,
+                                         ([block.name for block in self.blocks],))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+    def load(self, rows):
+        """Set the board from a list of row bitsets, as in LifeBoard.rows."""
+        buf = self.blocks[self.source].buf
+        size = self.row_bytes
+        for y, row in enumerate(rows):
+            buf[y * size:(y + 1) * size] = row.to_bytes(size, "little")
+        self.population = sum(bin(row).count("1") for row in rows)
+
+    def rows(self):
+        """Return the board as a list of row bitsets."""
+        buf = self.blocks[self.source].buf
+        size = self.row_bytes
+        return [int.from_bytes(buf[y * size:(y + 1) * size], "little") for y in range(self.height)]
+
+    def step(self, generations=1):
+        """Advance the board the given number of generations."""
+        for _ in range(generations):
+            tasks = [(self.source, self.width, self.height, start, stop)
+                     for start, stop in self.bands]
+            # map() returns once every band is written, which is the barrier between generations
+            self.population = sum(self.pool.map(_step_band, tasks))
+            self.source = 1 - self.source
+            self.generation += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step a large Life torus on several processes.")
+    parser.add_argument("--width", type=int, default=2048, help="board width in cells")
+    parser.add_argument("--height", type=int, default=2048, help="board height in cells")
+    parser.add_argument("--generations", type=int, default=20, help="generations to run")
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed")
+    parser.add_argument("--check", action="store_true",
+                        help="also step with a single process and compare the boards")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    board = LifeBoard(args.width, args.height)
+    board.randomize()
+
+    with ParallelLife(args.width, args.height, args.processes) as life:
+        life.load(board.rows)
+        start = time.perf_counter()
+        life.step(args.generations)
+        elapsed = time.perf_counter() - start
+        print("{}x{}, {} processes: {} generations in {:.2f} s, {:.1f} gen/s, {:.0f} cells/s, population {}".format(
+            args.width, args.height, life.processes, args.generations, elapsed,
+            args.generations / elapsed, args.width * args.height * args.generations / elapsed,
+            life.population))
+        result = life.rows()
+
+    if args.check:
+        rows = board.rows
+        start = time.perf_counter()
+        for _ in range(args.generations):
+            rows = step_rows(rows, args.width)
+        elapsed = time.perf_counter() - start
+        print("single process: {:.2f} s, {}".format(
+            elapsed, "identical" if rows == result else "MISMATCH"))
+        if rows != result:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Title: Touch Input
+
+About: Rate-limited, debounced touchscreen sampling for the PyPortal programs. Reading the
+resistive touchscreen costs several ADC conversions, so the panel is read at its own (lower)
+rate instead of every frame, and a touch only counts once it has been seen on a few samples
+in a row. Instead of a raw point every frame the program gets one PRESS when a finger lands,
+DRAG events while it moves and one RELEASE when it lifts.
+"""
+
+# Touch events returned by TouchSampler.poll()
+PRESS = 1
+DRAG = 2
+RELEASE = 3
+
+
+class TouchSampler:
+    """
+    Debounced touch events from an adafruit_touchscreen.Touchscreen.
+    - touchscreen: the Touchscreen to read
+    - sample_hz: how many times a second the panel is read
+    - debounce: consecutive samples needed before a press or release counts
+    - drag_distance: pixels a held touch must move before a DRAG is reported
+
+    x and y hold the position of the current (or last) touch.
+    """
+
+    def __init__(self, touchscreen, sample_hz=20, debounce=2, drag_distance=4):
+        self.touchscreen = touchscreen
+        self.interval = 1 / sample_hz
+        self.debounce = debounce
+        self.drag_distance2 = drag_distance * drag_distance
+        self.next_sample = 0
+        self.pressed = False
+        self.streak = 0
+        self.x = 0
+        self.y = 0
+
+    def poll(self, now):
+        """
+        Read the panel if a sample is due at time now (in seconds) and return PRESS, DRAG,
+        RELEASE or None.
+        """
+        if now < self.next_sample:
+            return None
+        self.next_sample = now + self.interval
+
+        point = self.touchscreen.touch_point
+        touching = point is not None
+        if touching != self.pressed:
+            # Only change state once the new reading has held for a few samples
+            self.streak += 1
+            if self.streak < self.debounce:
+                return None
+            self.streak = 0
+            self.pressed = touching
+            if touching:
+                self.x = point[0]
+                self.y = point[1]
+                return PRESS
+            return RELEASE
+
+        self.streak = 0
+        if touching:
+            dx = point[0] - self.x
+            dy = point[1] - self.y
+            if dx * dx + dy * dy >= self.drag_distance2:
+                self.x = point[0]
+                self.y = point[1]
+                return DRAG
+        return None